@@ -0,0 +1,184 @@
+"""Re-score stored articles with the current scoring prompt and model.
+
+Streams articles with a stored body out of content_creator.db in id order,
+scores them concurrently across one or more Ollama servers and writes the
+new proximity/freshness/impact back one chunk per transaction. Articles the
+live loop has not scored yet, or is working on, are left alone. Bodies past
+the content retention are read from the content archive; articles whose
+body is in neither place are skipped. Progress is checkpointed per chunk in
+backfill_runs, so an interrupted run resumes where it stopped. Uniqueness is
+left as it was.
+
+    python backfill.py --days 30 --endpoints http://gpu-1:11434,http://gpu-2:11434 --concurrency 2
+"""
+import argparse
+import asyncio
+import os
+import time
+import clients
+import content_store
+import my_prompts
+from db import get_connection, transaction
+from feeds import parse_utc
+from llm_cache import template_fingerprint
+from utils import arescore_article
+
+# ------------------------
+#   Backfill Parameters
+# ------------------------
+
+## Articles read, scored and written back per transaction
+CHUNK_SIZE = 200
+
+## Requests in flight per Ollama server
+CONCURRENCY = 2
+
+## Days of articles re-scored by default
+DEFAULT_DAYS = 30
+
+## Added to the process niceness so the live loop keeps priority on a shared host
+NICENESS = 10
+
+_HAS_BODY = "EXISTS (SELECT 1 FROM article_content c WHERE c.article_id = a.id)"
+_HAS_ARCHIVED_BODY = "EXISTS (SELECT 1 FROM archive.article_content x WHERE x.article_id = a.id)"
+# Unscored or claimed articles belong to the live loop: scoring them would hide a
+# crashed worker's article from claim_abandoned() and a failed story from promote_orphans()
+_IN_WINDOW = "a.id > ? AND a.received_at >= datetime('now', ?) AND a.proximity != -1 AND a.claimed_by IS NULL"
+
+
+def _chunk_sql(archived):
+    has_body = f"({_HAS_BODY} OR {_HAS_ARCHIVED_BODY})" if archived else _HAS_BODY
+    return (f"SELECT a.id, a.title, a.published_at, a.received_at FROM articles a "
+            f"WHERE {_IN_WINDOW} AND {has_body} ORDER BY a.id LIMIT ?",
+            f"SELECT COUNT(*), COALESCE(SUM({has_body}), 0) FROM articles a WHERE {_IN_WINDOW}")
+
+
+def default_run_name():
+    """One run per prompt/model combination, so re-running after a prompt change starts over."""
+    return f"scoring-{template_fingerprint(my_prompts.SCORING_PROMPT_TEMPLATE)[:8]}-{clients.model_for('scoring')}"
+
+
+# ------------------------
+#   Checkpoints
+# ------------------------
+def load_checkpoint(name):
+    with transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO backfill_runs (name) VALUES (?)", (name,))
+        return conn.execute("SELECT last_id, done, failed, finished_at FROM backfill_runs WHERE name = ?",
+                            (name,)).fetchone()
+
+
+def save_chunk(name, results, last_id, done, failed):
+    """Write a chunk's scores and advance the checkpoint in the same transaction."""
+    with transaction() as conn:
+        conn.executemany("UPDATE articles SET proximity = ?, freshness = ?, impact = ? WHERE id = ?", results)
+        conn.execute("""
+            UPDATE backfill_runs SET last_id = ?, done = ?, failed = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE name = ?
+        """, (last_id, done, failed, name))
+
+
+def finish(name):
+    with transaction() as conn:
+        conn.execute("UPDATE backfill_runs SET finished_at = CURRENT_TIMESTAMP WHERE name = ?", (name,))
+
+
+# ------------------------
+#   Scoring
+# ------------------------
+async def _worker(endpoint, jobs, results, stats, archived):
+    clients.use_endpoint(endpoint)
+    while True:
+        row = await jobs.get()
+        try:
+            article_id, title, published_at, received_at = row
+            # Freshness is judged as on arrival: publish time against the time the article was received
+            received_dt = parse_utc(received_at)
+            published_dt = parse_utc(published_at) or received_dt
+            content = content_store.load(article_id)
+            if not content and archived:
+                content = content_store.load_archived(article_id)
+            scores = await arescore_article(title, content, published_dt, as_of=received_dt)
+            results.append((scores["proximity"], scores["freshness"], scores["impact"], article_id))
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"[BACKFILL ERROR] article {row[0]} via {endpoint} → {e}")
+        finally:
+            jobs.task_done()
+
+
+async def run(name, days, endpoints, concurrency=CONCURRENCY, chunk_size=CHUNK_SIZE, limit=None):
+    last_id, done, failed, finished_at = load_checkpoint(name)
+    if finished_at:
+        print(f"[BACKFILL] {name} already finished at {finished_at}; use another --name to run again")
+        return
+    window = f"-{days} days"
+    archived = content_store.attach_archive(get_connection())
+    chunk_sql, count_sql = _chunk_sql(archived)
+    in_window, pending = get_connection().execute(count_sql, (last_id, window)).fetchone()
+    remaining = min(pending, limit) if limit else pending
+    print(f"[BACKFILL] {name}: {remaining} articles to score from id {last_id} "
+          f"on {len(endpoints)} endpoint(s) × {concurrency}")
+    if in_window > pending:
+        print(f"[BACKFILL] {in_window - pending} articles in the last {days} days have no stored or archived "
+              f"body and are skipped")
+
+    stats = {"failed": failed}
+    jobs = asyncio.Queue()
+    workers = []
+    results = []
+    for endpoint in endpoints:
+        for _ in range(concurrency):
+            workers.append(asyncio.create_task(_worker(endpoint, jobs, results, stats, archived)))
+
+    start = time.perf_counter()
+    scored = 0
+    try:
+        while remaining > scored:
+            rows = get_connection().execute(chunk_sql, (last_id, window, min(chunk_size, remaining - scored))).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                jobs.put_nowait(row)
+            await jobs.join()
+            last_id = rows[-1][0]
+            scored += len(rows)
+            done += len(results)
+            save_chunk(name, results, last_id, done, stats["failed"])
+            results.clear()
+
+            rate = scored / (time.perf_counter() - start) * 60
+            eta = (remaining - scored) / rate if rate else 0
+            print(f"[BACKFILL] {scored}/{remaining} ({done} updated, {stats['failed']} failed in total), "
+                  f"{rate:.1f} articles/min, ETA {eta:.0f} min")
+        if scored >= pending:
+            finish(name)
+    finally:
+        for w in workers:
+            w.cancel()
+    elapsed = time.perf_counter() - start
+    print(f"[BACKFILL] {scored} articles in {elapsed / 60:.1f} min "
+          f"({scored / elapsed * 60 if elapsed else 0:.1f} articles/min)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--days", type=int, default=DEFAULT_DAYS, help="re-score articles received in the last N days")
+    ap.add_argument("--endpoints", default=clients.OLLAMA_BASE_URL, help="comma-separated Ollama base URLs")
+    ap.add_argument("--concurrency", type=int, default=CONCURRENCY, help="requests in flight per endpoint")
+    ap.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="articles per checkpointed transaction")
+    ap.add_argument("--limit", type=int, help="stop after this many articles")
+    ap.add_argument("--name", help="checkpoint name (default: derived from the scoring prompt and model)")
+    args = ap.parse_args(argv)
+
+    if NICENESS and hasattr(os, "nice"):
+        os.nice(NICENESS)
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    try:
+        asyncio.run(run(args.name or default_run_name(), args.days, endpoints, args.concurrency, args.chunk, args.limit))
+    except KeyboardInterrupt:
+        print("[BACKFILL] Interrupted; run the same command again to resume from the last checkpoint")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Local stand-ins for the RSS feeds, publisher pages and Ollama used by the benchmark."""
+import email.utils
+import http.server
+import json
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+SOCCER_TITLES = [
+    "Arsenal beat Chelsea in Premier League derby",
+    "Real Madrid agree fee for Mbappé replacement",
+    "Haaland hat-trick sends Manchester City top",
+    "Liverpool injury blow ahead of Champions League tie",
+    "Bayern Munich sack coach after Bundesliga defeat",
+    "Barcelona striker joins Serie A side on loan",
+]
+OTHER_TITLES = [
+    "Chiefs quarterback throws four touchdowns in NFL win",
+    "Lakers edge Celtics in NBA overtime thriller",
+    "Favourite wins Kentucky Derby as jockey celebrates",
+    "Yankees pitcher throws no-hitter in MLB",
+]
+PARAGRAPH = ("The manager said after the match that his side had shown real character, "
+             "and the supporters inside the stadium responded with a standing ovation. ")
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The scraper closes the connection once it has enough text; that is not an error
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def _serve(handler_cls, **attrs):
+    server = _Server(("127.0.0.1", 0), handler_cls)
+    for k, v in attrs.items():
+        setattr(server, k, v)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ------------------------
+#   RSS + Article Pages
+# ------------------------
+class _NewsHandler(_Handler):
+    def do_GET(self):
+        s = self.server
+        parts = urlsplit(self.path)
+        time.sleep(s.latency)
+        if parts.path.startswith("/feed/"):
+            feed = int(parts.path.rsplit("/", 1)[1])
+            etag = f'"{feed}-{s.cycle}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._reply(b"", "application/rss+xml", status=304)
+                return
+            self._reply(s.render_feed(feed).encode(), "application/rss+xml", headers={"ETag": etag})
+        elif parts.path.startswith("/article/"):
+            self._reply(s.render_article(parts.path).encode(), "text/html; charset=utf-8")
+        else:
+            self._reply(b"not found", "text/plain", status=404)
+
+
+def start_news_server(feeds=4, items_per_feed=30, new_per_cycle=5, soccer_share=0.6,
+                      article_kb=300, latency=0.02, seed=1):
+    """Serve feeds at /feed/<n> and article pages at /article/<feed>/<item>.
+
+    Each call to next_cycle() publishes new_per_cycle fresh items per feed and
+    changes the feed's ETag, so conditional GETs behave like the real feeds.
+    """
+    server = None
+
+    def render_feed(feed):
+        now = email.utils.formatdate(usegmt=True)
+        newest = server.cycle * new_per_cycle + items_per_feed
+        items = []
+        for n in range(newest, newest - items_per_feed, -1):
+            r = random.Random(f"{seed}-{feed}-{n}")
+            title = r.choice(SOCCER_TITLES) if r.random() < soccer_share else r.choice(OTHER_TITLES)
+            items.append(
+                f"<item><title>{title} ({feed}-{n})</title>"
+                f"<link>http://127.0.0.1:{server.server_port}/article/{feed}/{n}</link>"
+                f"<description>{title}</description><pubDate>{now}</pubDate></item>"
+            )
+        return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {feed}</title>'
+                f'{"".join(items)}</channel></rss>')
+
+    def render_article(path):
+        script = "<script>" + "var x=" + "1" * 1000 + ";</script>"
+        filler = script * max(1, article_kb - 8)
+        paragraphs = "".join(f"<p>{PARAGRAPH * 3}</p>" for _ in range(12))
+        return (f"<html><head><title>{path}</title>{filler[:len(filler) // 2]}</head><body>"
+                f"<nav><p>Home</p><p>Sport</p></nav><article>{paragraphs}</article>"
+                f"<footer><p>© News</p></footer>{filler[len(filler) // 2:]}</body></html>")
+
+    server = _serve(_NewsHandler, latency=latency, cycle=0, render_feed=render_feed,
+                    render_article=render_article)
+    server.feed_urls = [f"http://127.0.0.1:{server.server_port}/feed/{i}" for i in range(feeds)]
+
+    def next_cycle():
+        server.cycle += 1
+
+    server.next_cycle = next_cycle
+    return server
+
+
+# ------------------------
+#   Ollama Chat Endpoint
+# ------------------------
+class _OllamaHandler(_Handler):
+    def do_POST(self):
+        s = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        messages = request.get("messages") or [{"content": request.get("prompt", "")}]
+        prompt = messages[-1]["content"]
+        with s.lock:
+            s.requests.append({"model": request.get("model"), "options": request.get("options") or {},
+                               "keep_alive": request.get("keep_alive"), "prompt_chars": len(prompt)})
+        prompt_tokens = len(prompt) // 4
+        time.sleep(s.latency + prompt_tokens * s.per_token_latency)
+        text = s.answer(prompt)
+        chunks = [
+            {"model": request.get("model"), "message": {"role": "assistant", "content": text}, "done": False},
+            {"model": request.get("model"), "message": {"role": "assistant", "content": ""}, "done": True,
+             "prompt_eval_count": prompt_tokens, "eval_count": max(1, len(text) // 4),
+             "prompt_eval_duration": int(prompt_tokens * s.per_token_latency * 1e9),
+             "eval_duration": int(s.latency * 1e9), "total_duration": int((s.latency + prompt_tokens * s.per_token_latency) * 1e9)},
+        ]
+        body = ("\n".join(json.dumps(c) for c in chunks) + "\n").encode()
+        self._reply(body, "application/x-ndjson")
+
+
+def canned_answer(prompt):
+    if "sports news classifier" in prompt:
+        soccer = any(t.split(" (")[0] in prompt for t in SOCCER_TITLES)
+        scores = {"soccer_relevance": soccer, "proximity": 1.0 if soccer else 0.0,
+                  "freshness": 9, "impact": 8 if soccer else 0}
+        if "uniqueness" in prompt:
+            scores["uniqueness"] = 1
+        return json.dumps(scores)
+    if "unique" in prompt:
+        return json.dumps({"uniqueness": 1})
+    return "Big night in the league! ⚽🔥 #Football"
+
+
+def start_ollama_server(latency=0.5, per_token_latency=0.0, answer=canned_answer):
+    """Ollama-compatible /api/chat answering with canned JSON after a tunable delay."""
+    return _serve(_OllamaHandler, latency=latency, per_token_latency=per_token_latency,
+                  answer=answer, requests=[], lock=threading.Lock())
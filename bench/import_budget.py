@@ -0,0 +1,88 @@
+"""Check import-time budgets with `python -X importtime`.
+
+Each module is imported in a fresh interpreter, from a working directory
+without config.ini whose database is seeded with SEED_ARTICLES articles
+(import time must not grow with the data), a few times; the best cumulative
+import time must stay within its budget and none of the listed heavy
+libraries may be loaded. Exits non-zero when a budget is exceeded.
+
+    python bench/import_budget.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## Client libraries that must only load on first use (see clients.py)
+HEAVY = ("langchain", "langchain_core", "langchain_community", "langsmith", "telethon", "tweepy")
+
+## Articles (one post per 100) stored before measuring
+SEED_ARTICLES = 200_000
+
+SEED = """
+import sys
+from db import transaction
+with transaction() as conn:
+    conn.executemany("INSERT INTO articles (title, url, received_at, posted) VALUES (?, ?, datetime('now'), ?)",
+                     ((f"Story {i}", f"https://example.com/{i}", int(i % 100 == 0)) for i in range(int(sys.argv[1]))))
+    conn.execute("INSERT INTO posts (article_id, caption) SELECT id, title FROM articles WHERE posted = 1")
+"""
+
+## module → (budget in ms, libraries it must not import)
+BUDGETS = {
+    "db": (60, HEAVY + ("requests", "numpy", "bs4")),
+    "delivery": (120, HEAVY + ("requests", "numpy", "bs4")),
+    "utils": (800, HEAVY),
+    "backfill": (800, HEAVY),
+}
+
+
+def seed(workdir, articles=SEED_ARTICLES):
+    """Create, migrate and fill the database outside the measured runs."""
+    subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {REPO_DIR!r})" + SEED, str(articles)],
+                   cwd=workdir, capture_output=True, text=True, check=True)
+
+
+def measure(module, workdir):
+    """Return (cumulative µs for module, set of top-level packages imported)."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {REPO_DIR!r}); import {module}"],
+        cwd=workdir, capture_output=True, text=True, check=True,
+    ).stderr
+    total, loaded = None, set()
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            loaded.add(name.strip().split(".")[0])
+            if name.strip() == module and not name.startswith("  "):
+                total = int(cumulative)
+    return total, loaded
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--articles", type=int, default=SEED_ARTICLES, help="articles in the seeded database")
+    args = ap.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="sporttweet-import-") as workdir:
+        seed(workdir, args.articles)
+        for module, (budget_ms, forbidden) in BUDGETS.items():
+            runs = [measure(module, workdir) for _ in range(args.runs)]
+            best_ms = min(total for total, _ in runs) / 1000
+            heavy = sorted(set(forbidden) & runs[0][1])
+            ok = best_ms <= budget_ms and not heavy
+            failed |= not ok
+            print(f"[IMPORT] {'OK  ' if ok else 'FAIL'} {module:<10} {best_ms:7.1f} ms (budget {budget_ms} ms)"
+                  + (f", loads {', '.join(heavy)}" if heavy else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
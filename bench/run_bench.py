@@ -0,0 +1,145 @@
+"""Offline end-to-end benchmark of the news pipeline.
+
+Starts local stand-ins for the RSS feeds, the publisher pages and Ollama,
+points the pipeline at them from a temporary working directory (fresh
+content_creator.db and config.ini), runs a few fetch cycles and reports
+per-stage and end-to-end latency percentiles and articles/minute.
+
+    python bench/run_bench.py --feeds 8 --cycles 3 --llm-latency 0.3
+"""
+import argparse
+import functools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes
+
+_timings = defaultdict(list)
+_timings_lock = threading.Lock()
+
+
+def _record(stage, seconds):
+    with _timings_lock:
+        _timings[stage].append(seconds)
+
+
+def _timed(stage, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record(stage, time.perf_counter() - start)
+    return wrapper
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def report(elapsed, articles, out=sys.stdout):
+    print(f"\n{'stage':<24}{'n':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'total s':>10}", file=out)
+    for stage, values in sorted(_timings.items()):
+        print(f"{stage:<24}{len(values):>6}{percentile(values, 50) * 1000:>10.1f}"
+              f"{percentile(values, 90) * 1000:>10.1f}{percentile(values, 99) * 1000:>10.1f}"
+              f"{sum(values):>10.2f}", file=out)
+    print(f"\n{articles} articles processed in {elapsed:.1f}s → {articles / elapsed * 60:.1f} articles/min", file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--feeds", type=int, default=4)
+    ap.add_argument("--items-per-feed", type=int, default=30)
+    ap.add_argument("--new-per-cycle", type=int, default=5, help="fresh items per feed per cycle")
+    ap.add_argument("--soccer-share", type=float, default=0.6)
+    ap.add_argument("--article-kb", type=int, default=300)
+    ap.add_argument("--http-latency", type=float, default=0.02, help="seconds per RSS/article response")
+    ap.add_argument("--llm-latency", type=float, default=0.3, help="seconds per Ollama call")
+    ap.add_argument("--llm-per-token", type=float, default=0.0, help="extra seconds per prompt token")
+    ap.add_argument("--cycles", type=int, default=3)
+    ap.add_argument("--mode", choices=["serial", "batch"], default="batch",
+                    help="serial: process_news_item per entry; batch: process_news_items")
+    ap.add_argument("--cluster", action="store_true",
+                    help="cluster stories across feeds (the fake feeds reuse a handful of titles)")
+    ap.add_argument("--keep", action="store_true", help="keep the temporary working directory")
+    args = ap.parse_args(argv)
+
+    news = fakes.start_news_server(args.feeds, args.items_per_feed, args.new_per_cycle, args.soccer_share,
+                                   args.article_kb, args.http_latency)
+    ollama = fakes.start_ollama_server(args.llm_latency, args.llm_per_token)
+
+    workdir = tempfile.mkdtemp(prefix="sporttweet-bench-")
+    shutil.copy(os.path.join(REPO_DIR, "config.sample.ini"), os.path.join(workdir, "config.ini"))
+    os.chdir(workdir)
+    os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{ollama.server_port}"
+    warnings.filterwarnings("ignore")
+
+    import feeds
+    feeds.FEEDS[:] = news.feed_urls
+    import scraper
+    import utils
+    utils.POST_MODE = None
+    utils.CLUSTER_STORIES = args.cluster
+
+    fetch = utils.fetch_top_sports_news
+    utils.fetch_top_sports_news = _timed("fetch", lambda *a, **kw: list(fetch(*a, **kw)))
+    scraper.fetch_article_text = utils.fetch_article_text = _timed("scrape", utils.fetch_article_text)
+    utils.score_article_with_llm = _timed("score", utils.score_article_with_llm)
+    utils.generate_tweet = _timed("generate_tweet", utils.generate_tweet)
+    utils.decide_non_urgent_posts = _timed("decide_non_urgent", utils.decide_non_urgent_posts)
+    utils.post_non_urgent = _timed("post_non_urgent", utils.post_non_urgent)
+    process_item = _timed("process_news_item", utils.process_news_item)
+
+    articles = 0
+    start = time.perf_counter()
+    for _ in range(args.cycles):
+        cycle_start = time.perf_counter()
+        marks = {}
+        items = utils.fetch_top_sports_news(marks=marks)
+        scored_before = len(_timings["score"])
+        if args.mode == "serial":
+            for item in items:
+                process_item(item["title"], item["url"], item["published"], item["published_dt"],
+                             item.get("summary", ""))
+            utils.save_feed_marks(marks)
+        else:
+            utils.process_news_items(items, marks)
+        for article_id in utils.decide_non_urgent_posts():
+            utils.post_non_urgent(article_id)
+        articles += len(_timings["score"]) - scored_before
+        _record("cycle (end-to-end)", time.perf_counter() - cycle_start)
+        news.next_cycle()
+    elapsed = time.perf_counter() - start
+
+    report(elapsed, articles)
+    print(f"{len(ollama.requests)} Ollama requests, LLM cache: {utils.llm_cache.summary()}")
+    routes = defaultdict(list)
+    for r in ollama.requests:
+        routes[(r["model"], r["options"].get("num_ctx"), r["keep_alive"])].append(r["prompt_chars"])
+    for (model, num_ctx, keep_alive), chars in sorted(routes.items(), key=str):
+        print(f"  {len(chars):>4} × {model} num_ctx={num_ctx} keep_alive={keep_alive} "
+              f"(prompts {min(chars)}–{max(chars)} chars)")
+    if args.keep:
+        print(f"working directory kept at {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import configparser
+import contextvars
+import os
+import threading
+
+# ------------------------
+#   Client Parameters
+# ------------------------
+
+## Credentials file read on first use of a platform client
+CONFIG_PATH = "config.ini"
+
+## Ollama server and default model
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+LLM_MODEL = "gemma3:4b-it-q8_0"
+
+## Model (or quantization) per LLM task; tasks not listed use LLM_MODEL
+LLM_TASK_MODELS = {
+    "scoring": LLM_MODEL,
+    "combined_scoring": LLM_MODEL,
+    "uniqueness": LLM_MODEL,
+    "tweet": LLM_MODEL,
+}
+
+## How long Ollama keeps a model loaded after a call
+LLM_KEEP_ALIVE = "30m"
+
+## Bounds for a model's context window, in tokens
+LLM_MIN_CTX = 2048
+LLM_MAX_CTX = 65536
+
+## Longest prompt each task is expected to send, in characters; sizes its model's context up front
+LLM_TASK_PROMPT_CHARS = {
+    "scoring": 4000,
+    "combined_scoring": 8000,
+    "uniqueness": 4000,
+    "tweet": 6000,
+}
+
+## Tokens reserved for the answer on top of the prompt
+LLM_ANSWER_TOKENS = 512
+
+## Prompt length estimate before any answer has been measured (deliberately low)
+CHARS_PER_TOKEN = 3.0
+
+_factories = {}
+_clients = {}
+_config = None
+_lock = threading.RLock()
+_chars_per_token = {}
+_model_ctx = {}
+
+# Registry name of the Ollama client used by the current thread or asyncio task
+_llm_name = contextvars.ContextVar("llm_name", default="llm")
+
+
+# ------------------------
+#   Registry
+# ------------------------
+def get_config():
+    """Read config.ini once; a missing file only disables the platform clients."""
+    global _config
+    with _lock:
+        if _config is None:
+            _config = configparser.ConfigParser()
+            if not _config.read(CONFIG_PATH):
+                print(f"[CONFIG] {CONFIG_PATH} not found, Twitter and Telegram are disabled")
+        return _config
+
+
+def register(name):
+    """Register a zero-argument factory building the named client."""
+    def decorator(factory):
+        _factories[name] = factory
+        return factory
+    return decorator
+
+
+def get(name):
+    """Return the named client, building it (and importing its library) on first use.
+
+    Returns None when the client is not configured; the factory runs only once.
+    """
+    with _lock:
+        if name not in _clients:
+            try:
+                _clients[name] = _factories[name]()
+            except Exception as ex:
+                print(f"[CLIENT ERROR] Could not set up {name}: {ex}")
+                _clients[name] = None
+        return _clients[name]
+
+
+def reset(name=None):
+    """Forget built clients (all of them, or one) so the next get() rebuilds them."""
+    global _config
+    with _lock:
+        if name is None:
+            _clients.clear()
+            _config = None
+        else:
+            _clients.pop(name, None)
+
+
+# ------------------------
+#   Factories
+# ------------------------
+def make_llm(base_url=OLLAMA_BASE_URL):
+    from langchain_community.chat_models import ChatOllama
+    return ChatOllama(model=LLM_MODEL, temperature=0, num_ctx=LLM_MAX_CTX, keep_alive=LLM_KEEP_ALIVE,
+                      base_url=base_url)
+
+
+@register("llm")
+def _llm():
+    return make_llm()
+
+
+@register("twitter")
+def _twitter():
+    config = get_config()
+    keys = [config.get("TWITTER_API", k, fallback="")
+            for k in ("TW_CONSUMER_KEY", "TW_CONSUMER_SECRET", "TW_ACCESS_TOKEN", "TW_ACCESS_SECRET")]
+    if not all(keys):
+        return None
+    import tweepy
+    return tweepy.API(tweepy.OAuth1UserHandler(*keys))
+
+
+@register("telegram")
+def _telegram():
+    """Unconnected Telethon client; the caller starts it on its own event loop."""
+    config = get_config()
+    api_id = int(config.get("TELEGRAM_API", "API_ID"))
+    from telethon import TelegramClient
+    return TelegramClient(config.get("TELEGRAM_API", "SESSION_NAME"), api_id, config.get("TELEGRAM_API", "API_HASH"))
+
+
+def telegram_admin():
+    """Chat that receives Telegram posts; "me" means your own account."""
+    return get_config().get("TELEGRAM_API", "TELEGRAM_ADMIN", fallback="me")
+
+
+# ------------------------
+#   LLM Routing
+# ------------------------
+def llm():
+    """The Ollama client for the current thread or asyncio task (see use_endpoint)."""
+    return get(_llm_name.get())
+
+
+def use_endpoint(base_url):
+    """Send this thread's or asyncio task's LLM calls to another Ollama server."""
+    name = f"llm@{base_url}"
+    with _lock:
+        if name not in _factories:
+            register(name)(lambda: make_llm(base_url))
+    _llm_name.set(name)
+
+
+def model_for(task):
+    return LLM_TASK_MODELS.get(task, LLM_MODEL)
+
+
+def _rounded_ctx(task, prompt_chars):
+    """Estimated tokens plus answer room, rounded up to a power of two."""
+    needed = prompt_chars / _chars_per_token.get(task, CHARS_PER_TOKEN) * 1.1 + LLM_ANSWER_TOKENS
+    size = LLM_MIN_CTX
+    while size < needed and size < LLM_MAX_CTX:
+        size *= 2
+    return min(size, LLM_MAX_CTX)
+
+
+def context_size(task, prompt_chars):
+    """num_ctx for the task's model: one size per model, from the largest task routed to it.
+
+    Ollama reloads a model whenever num_ctx changes, so every call to a model
+    sends the same size. It only grows, when a prompt turns out longer than
+    LLM_TASK_PROMPT_CHARS expected; different models are sized independently.
+    """
+    model = model_for(task)
+    with _lock:
+        size = max([_model_ctx.get(model, LLM_MIN_CTX), _rounded_ctx(task, prompt_chars)] +
+                   [_rounded_ctx(t, chars) for t, chars in LLM_TASK_PROMPT_CHARS.items() if model_for(t) == model])
+        _model_ctx[model] = size
+    return size
+
+
+def llm_options(task, prompt_chars):
+    """Per-call ChatOllama overrides: the task's model, the model's context size and keep_alive."""
+    return {"model": model_for(task), "num_ctx": context_size(task, prompt_chars), "keep_alive": LLM_KEEP_ALIVE}
+
+
+def record_prompt(task, prompt_chars, prompt_tokens):
+    """Learn the task's characters per token from the prompt_eval_count Ollama reports."""
+    if not prompt_tokens:
+        return
+    ratio = prompt_chars / prompt_tokens
+    with _lock:
+        # Keep the lowest ratio seen: underestimating tokens would truncate prompts
+        _chars_per_token[task] = min(ratio, _chars_per_token.get(task, ratio))
@@ -0,0 +1,157 @@
+import threading
+import time
+import numpy as np
+from db import get_connection
+from uniqueness import DIMENSIONS, normalize_text, vectorize
+
+# ------------------------
+#   Clustering Parameters
+# ------------------------
+
+## Cosine similarity of title + summary at or above which two entries report the same story
+CLUSTER_THRESHOLD = 0.5
+
+## Seconds an unposted story keeps absorbing duplicates from other feeds
+CLUSTER_WINDOW = 6 * 3600
+
+
+def _story_text(title, summary):
+    return f"{title or ''} {normalize_text(summary)[:300]}"
+
+
+class StoryClusters:
+    """Unposted stories seen recently, one representative article per story.
+
+    Each new feed entry is compared with every representative in one matrix
+    product. Entries close enough to one join its cluster (articles.cluster_id
+    points at the representative) and are neither scraped nor scored; the
+    others become representatives themselves. refresh() picks up stories
+    admitted by other workers, promote_orphans() moves a story on to its next
+    member when the representative fails, and posted stories are handed over
+    to the uniqueness index.
+    """
+
+    def __init__(self, threshold=CLUSTER_THRESHOLD, window=CLUSTER_WINDOW):
+        self.threshold = threshold
+        self.window = window
+        self._matrix = np.zeros((64, DIMENSIONS), dtype=np.float32)
+        self._ids = []
+        self._titles = []
+        self._times = []
+        self._last_id = 0
+        self.clustered = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _add(self, article_id, title, summary, timestamp):
+        if article_id in self._ids:
+            return
+        n = len(self._ids)
+        if n == len(self._matrix):
+            self._matrix = np.vstack([self._matrix, np.zeros_like(self._matrix)])
+        self._matrix[n] = vectorize(_story_text(title, summary))
+        self._ids.append(article_id)
+        self._titles.append(title)
+        self._times.append(timestamp)
+
+    def _keep(self, keep):
+        self._matrix[:len(keep)] = self._matrix[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._titles = [self._titles[i] for i in keep]
+        self._times = [self._times[i] for i in keep]
+
+    def _expire(self):
+        cutoff = time.time() - self.window
+        keep = [i for i, t in enumerate(self._times) if t >= cutoff]
+        if len(keep) != len(self._times):
+            self._keep(keep)
+
+    def refresh(self):
+        """Load representatives stored since the last refresh (including other workers' ones)."""
+        cursor = get_connection().execute("""
+            SELECT id, title, summary, strftime('%s', received_at) FROM articles
+            WHERE id > ? AND cluster_id = id AND posted = 0 AND received_at >= datetime('now', ?)
+            ORDER BY id
+        """, (self._last_id, f"-{int(self.window)} seconds"))
+        with self._lock:
+            for article_id, title, summary, received_at in cursor.fetchall():
+                self._add(article_id, title, summary, float(received_at))
+                self._last_id = article_id
+            self._expire()
+
+    def assign(self, conn, url, title, summary=""):
+        """Record the stored article's cluster inside the caller's transaction.
+
+        Returns the representative's title if the article joined an existing
+        story, or None if it starts a new one and should be scraped.
+        """
+        row = conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        article_id = row[0]
+        vec = vectorize(_story_text(title, summary))
+        with self._lock:
+            n = len(self._ids)
+            sims = self._matrix[:n] @ vec if n else np.zeros(0)
+            best = int(np.argmax(sims)) if n else -1
+            if n and sims[best] >= self.threshold:
+                # Follow a promotion (see promote_orphans) another worker may have made since our refresh
+                conn.execute("""
+                    UPDATE articles SET cluster_id = (SELECT COALESCE(cluster_id, id) FROM articles WHERE id = ?)
+                    WHERE id = ?
+                """, (self._ids[best], article_id))
+                self.clustered += 1
+                return self._titles[best]
+            conn.execute("UPDATE articles SET cluster_id = id WHERE id = ?", (article_id,))
+            self._add(article_id, title, summary, time.time())
+            return None
+
+    def promote_orphans(self, conn, limit=20):
+        """Hand each story whose representative gave up unscored to its next member.
+
+        A representative is given up when it is released with no scores (scrape
+        error, short page, LLM failure). Its earliest later member becomes the
+        representative of the whole cluster. Runs inside the caller's
+        transaction and returns the promoted article ids, still unclaimed.
+        """
+        rows = conn.execute("""
+            SELECT old, new FROM (
+                SELECT r.id AS old, (
+                    SELECT m.id FROM articles m
+                    WHERE m.cluster_id = r.id AND m.id > r.id AND m.posted = 0 AND m.proximity = -1
+                      AND m.claimed_by IS NULL
+                    ORDER BY m.id LIMIT 1
+                ) AS new
+                FROM articles r
+                WHERE r.cluster_id = r.id AND r.claimed_by IS NULL AND r.posted = 0 AND r.proximity = -1
+                  AND r.received_at >= datetime('now', ?)
+            )
+            WHERE new IS NOT NULL
+            LIMIT ?
+        """, (f"-{int(self.window)} seconds", limit)).fetchall()
+        promoted = []
+        for old, new in rows:
+            conn.execute("UPDATE articles SET cluster_id = ? WHERE cluster_id = ?", (new, old))
+            with self._lock:
+                if old in self._ids:
+                    self._ids[self._ids.index(old)] = new
+            promoted.append(new)
+        return promoted
+
+    def discard(self, article_id):
+        """Stop matching against a story once it is posted."""
+        with self._lock:
+            if article_id in self._ids:
+                self._keep([i for i, known in enumerate(self._ids) if known != article_id])
+
+    def summary(self):
+        return f"{len(self)} open stories, {self.clustered} duplicate entries not scraped"
+
+    @classmethod
+    def load(cls, threshold=CLUSTER_THRESHOLD, window=CLUSTER_WINDOW):
+        index = cls(threshold, window)
+        index.refresh()
+        print(f"[CLUSTER] Loaded {len(index)} open stories")
+        return index
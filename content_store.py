@@ -0,0 +1,136 @@
+import os
+import time
+import zlib
+from db import get_connection, transaction
+
+# ------------------------
+#   Content Store Parameters
+# ------------------------
+
+## zlib level for article bodies (6 is zlib's default speed/size trade-off)
+COMPRESSION_LEVEL = 6
+
+## Days an article body is kept; scoring and posting only need the last day or so
+CONTENT_RETENTION_DAYS = 7
+
+## Bodies older than the retention are moved here (set to None to simply delete them)
+ARCHIVE_PATH = "content_archive.db"
+
+## Free pages returned to the OS per compaction (0 = all of them)
+VACUUM_PAGES = 0
+
+
+# ------------------------
+#   Article Bodies
+# ------------------------
+def _encode(text):
+    raw = text.encode()
+    return zlib.compress(raw, COMPRESSION_LEVEL), len(raw)
+
+
+def _decode(codec, data):
+    if codec == "zlib":
+        return zlib.decompress(data).decode()
+    raise ValueError(f"unknown content codec {codec!r}")
+
+
+def store(url, text):
+    """Compress and store the scraped body of the article with this URL."""
+    data, raw_size = _encode(text)
+    with transaction() as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO article_content (article_id, codec, data, raw_size, stored_at)
+            SELECT id, 'zlib', ?, ?, ? FROM articles WHERE url = ?
+        """, (data, raw_size, time.time(), url))
+
+
+def load(article_id):
+    """Return the article body, or "" if it was never scraped or has been compacted away."""
+    row = get_connection().execute("SELECT codec, data FROM article_content WHERE article_id = ?",
+                                   (article_id,)).fetchone()
+    return _decode(*row) if row else ""
+
+
+def attach_archive(conn, archive_path=ARCHIVE_PATH):
+    """Attach the archive as schema "archive" for load_archived(); False if there is nothing archived yet."""
+    if not archive_path or not os.path.exists(archive_path):
+        return False
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    if not conn.execute("SELECT 1 FROM archive.sqlite_master WHERE name = 'article_content'").fetchone():
+        conn.execute("DETACH DATABASE archive")
+        return False
+    return True
+
+
+def load_archived(article_id):
+    """Like load(), but reads a body compacted into the attached archive."""
+    row = get_connection().execute("SELECT codec, data FROM archive.article_content WHERE article_id = ?",
+                                   (article_id,)).fetchone()
+    return _decode(*row) if row else ""
+
+
+# ------------------------
+#   Retention & Compaction
+# ------------------------
+def _archive(conn, cutoff):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive.article_content (
+            article_id INTEGER PRIMARY KEY, url TEXT, title TEXT, codec TEXT, data BLOB,
+            raw_size INTEGER, stored_at REAL
+        )""")
+    return conn.execute("""
+        INSERT OR REPLACE INTO archive.article_content
+        SELECT c.article_id, a.url, a.title, c.codec, c.data, c.raw_size, c.stored_at
+        FROM article_content c LEFT JOIN articles a ON a.id = c.article_id
+        WHERE c.stored_at < ?
+    """, (cutoff,)).rowcount
+
+
+def compact(retention_days=CONTENT_RETENTION_DAYS, archive_path=ARCHIVE_PATH, vacuum_pages=VACUUM_PAGES):
+    """Archive and drop article bodies past the retention, then give free pages back to the OS.
+
+    Article rows themselves are kept: the seen-URL index and the post history
+    rely on them. Returns the number of bodies removed.
+    """
+    conn = get_connection()
+    start = time.perf_counter()
+    size_before = os.path.getsize(conn.execute("PRAGMA database_list").fetchone()[2])
+    cutoff = time.time() - retention_days * 86400
+
+    if archive_path:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    try:
+        with transaction():
+            archived = _archive(conn, cutoff) if archive_path else 0
+            removed = conn.execute("DELETE FROM article_content WHERE stored_at < ?", (cutoff,)).rowcount
+    finally:
+        if archive_path:
+            conn.execute("DETACH DATABASE archive")
+
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Databases created before incremental auto-vacuum need one full VACUUM to switch over
+        print("[COMPACT] Switching the database to incremental auto-vacuum (one-off full VACUUM)")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    size_after = os.path.getsize(conn.execute("PRAGMA database_list").fetchone()[2])
+    print(f"[COMPACT] {removed} bodies older than {retention_days}d removed ({archived} archived), "
+          f"{size_before / 1024:.0f} KB → {size_after / 1024:.0f} KB in {time.perf_counter() - start:.1f}s")
+    return removed
+
+
+def summary():
+    rows, raw, stored = get_connection().execute(
+        "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(length(data)), 0) FROM article_content"
+    ).fetchone()
+    ratio = raw / stored if stored else 0
+    return f"{rows} bodies, {raw / 1024:.0f} KB raw → {stored / 1024:.0f} KB stored ({ratio:.1f}x)"
+
+
+if __name__ == "__main__":
+    print(f"[COMPACT] {summary()}")
+    compact()
+    print(f"[COMPACT] {summary()}")
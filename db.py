@@ -1,10 +1,94 @@
 import sqlite3
 import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+import metrics
 
 DB_PATH = "content_creator.db"
-# === Setup Tables ===
-with sqlite3.connect(DB_PATH) as conn:
-    cur = conn.cursor()
+
+## Statements kept compiled per connection (sqlite3 caches them by SQL text)
+STATEMENT_CACHE_SIZE = 256
+
+## Seconds a writer waits for a lock held by another process
+BUSY_TIMEOUT = 30
+
+_local = threading.local()
+
+
+# === Connection Layer ===
+def _configure(conn):
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}")
+    # Only takes effect on a new database; content_store.compact() converts old ones
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # Switching a new database to WAL fails at once, without waiting for busy_timeout,
+    # while another process starting at the same time is switching it
+    deadline = time.monotonic() + BUSY_TIMEOUT
+    while True:
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            break
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+
+def get_connection():
+    """Return this thread's long-lived connection, opening it on first use.
+
+    The connection runs in autocommit mode; use transaction() to group writes.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        _configure(conn)
+        _local.conn = conn
+        _local.depth = 0
+    return conn
+
+
+@contextmanager
+def transaction():
+    """Group writes into one transaction; nested blocks join the outermost one.
+
+    The write lock is taken up front: in WAL mode a deferred transaction that
+    reads first fails at once with "database is locked" (busy_timeout does not
+    apply) if another connection commits before its first write.
+    """
+    conn = get_connection()
+    if _local.depth == 0:
+        conn.execute("BEGIN IMMEDIATE")
+        _local.started_at = time.perf_counter()
+    _local.depth += 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth -= 1
+        if _local.depth == 0:
+            conn.rollback()
+            metrics.observe("stage_seconds", time.perf_counter() - _local.started_at, stage="sqlite")
+        raise
+    else:
+        _local.depth -= 1
+        if _local.depth == 0:
+            conn.commit()
+            metrics.observe("stage_seconds", time.perf_counter() - _local.started_at, stage="sqlite")
+
+
+def close_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+# === Migrations ===
+def _migration_1(cur):
+    """Baseline schema."""
     cur.execute("""
     CREATE TABLE IF NOT EXISTS articles (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -43,4 +127,215 @@ with sqlite3.connect(DB_PATH) as conn:
         path TEXT,
         FOREIGN KEY(post_id) REFERENCES posts(id)
     )""")
-    conn.commit()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS feeds (
+        url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        content_length INTEGER DEFAULT 0,
+        last_fetched_at TIMESTAMP
+    )""")
+
+
+def _migration_2(cur):
+    """Indexes for the "today" queries and the posts → articles join."""
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_articles_posted_received ON articles (posted, received_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_posts_created ON posts (created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_posts_article ON posts (article_id)")
+
+
+def _migration_3(cur):
+    """LLM result cache."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        template TEXT,
+        model TEXT,
+        response TEXT,
+        created_at REAL,
+        last_used_at REAL,
+        hits INTEGER DEFAULT 0
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used_at)")
+
+
+def _migration_4(cur):
+    """Adaptive polling state per feed."""
+    cur.execute("ALTER TABLE feeds ADD COLUMN poll_interval REAL")
+    cur.execute("ALTER TABLE feeds ADD COLUMN next_due_at REAL")
+    cur.execute("ALTER TABLE feeds ADD COLUMN last_new_at REAL")
+    cur.execute("ALTER TABLE feeds ADD COLUMN gap_ewma REAL")
+
+
+def _migration_5(cur):
+    """Outbox for asynchronous post delivery."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        post_id INTEGER,
+        platform TEXT,
+        message TEXT,
+        status TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        next_attempt_at REAL,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP,
+        FOREIGN KEY(post_id) REFERENCES posts(id)
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+
+
+def _migration_6(cur):
+    """Article leases for multiple workers."""
+    cur.execute("ALTER TABLE articles ADD COLUMN claimed_by TEXT")
+    cur.execute("ALTER TABLE articles ADD COLUMN lease_expires REAL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_articles_lease ON articles (lease_expires) WHERE claimed_by IS NOT NULL")
+
+
+def _migration_7(cur):
+    """Compressed article bodies in their own table."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS article_content (
+        article_id INTEGER PRIMARY KEY,
+        codec TEXT NOT NULL,
+        data BLOB NOT NULL,
+        raw_size INTEGER,
+        stored_at REAL,
+        FOREIGN KEY(article_id) REFERENCES articles(id)
+    )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_article_content_stored ON article_content (stored_at)")
+    rows = cur.connection.execute(
+        "SELECT id, content, strftime('%s', received_at) FROM articles WHERE content IS NOT NULL")
+    while batch := rows.fetchmany(500):
+        cur.executemany("INSERT OR REPLACE INTO article_content VALUES (?, 'zlib', ?, ?, ?)", [
+            (article_id, zlib.compress(content.encode()), len(content.encode()), float(received_at or time.time()))
+            for article_id, content, received_at in batch
+        ])
+    cur.execute("UPDATE articles SET content = NULL WHERE content IS NOT NULL")
+
+
+def _migration_8(cur):
+    """Covering index for ranking today's non-urgent candidates."""
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_articles_candidates
+        ON articles (posted, received_at, uniqueness, proximity, freshness, impact)
+    """)
+    # Same leading columns, so the "today" queries use the new index instead
+    cur.execute("DROP INDEX IF EXISTS idx_articles_posted_received")
+
+
+def _migration_9(cur):
+    """Checkpoints for bulk re-scoring runs."""
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS backfill_runs (
+        name TEXT PRIMARY KEY,
+        last_id INTEGER DEFAULT 0,
+        done INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP,
+        finished_at TIMESTAMP
+    )""")
+
+
+def _migration_10(cur):
+    """High-water marks for incremental feed processing."""
+    cur.execute("ALTER TABLE feeds ADD COLUMN hwm_published REAL")
+    cur.execute("ALTER TABLE feeds ADD COLUMN recent_guids TEXT")
+
+
+def _migration_11(cur):
+    """Story clusters across feeds."""
+    cur.execute("ALTER TABLE articles ADD COLUMN summary TEXT")
+    cur.execute("ALTER TABLE articles ADD COLUMN cluster_id INTEGER REFERENCES articles(id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles (cluster_id)")
+
+
+## Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    _migration_1,
+    _migration_2,
+    _migration_3,
+    _migration_4,
+    _migration_5,
+    _migration_6,
+    _migration_7,
+    _migration_8,
+    _migration_9,
+    _migration_10,
+    _migration_11,
+]
+
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        # Another worker starting at the same time may have applied it while we waited for the lock
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= number:
+            conn.rollback()
+            continue
+        try:
+            migration(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        print(f"[DB] Applied migration {number}: {migration.__doc__}")
+
+
+# === Hot Queries ===
+# Day filters compare the raw timestamp against a range instead of wrapping
+# the column in date(), so the indexes above can be used.
+def today_range(column):
+    return f"{column} >= date('now') AND {column} < date('now', '+1 day')"
+
+
+# Ranked non-urgent candidates: a weighted sum of the scores, divided by
+# (1 + age / half-life) so an article's rank halves after one half-life.
+NON_URGENT_CANDIDATES_SQL = f"""
+    SELECT id,
+           (:w_impact * impact + :w_freshness * freshness + :w_proximity * proximity)
+           / (1 + max(0, julianday('now') - julianday(received_at)) * 24 / :half_life) AS rank
+    FROM articles
+    WHERE posted=0 AND {today_range('received_at')}
+      AND uniqueness >= :uniqueness AND proximity >= :proximity AND freshness >= :freshness
+    ORDER BY rank DESC, id
+    LIMIT :limit
+"""
+TODAY_POST_HISTORY_SQL = f"SELECT caption FROM posts WHERE {today_range('created_at')}"
+TODAY_POST_COUNT_SQL = f"SELECT COUNT(*) FROM posts WHERE {today_range('created_at')}"
+POSTS_FOR_ARTICLE_SQL = "SELECT id FROM posts WHERE article_id = ?"
+
+
+def explain(sql, params=()):
+    """Return the detail lines of EXPLAIN QUERY PLAN for a statement."""
+    return [row[-1] for row in get_connection().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_query_plans():
+    """Print the plan of each hot query; returns False if any of them scans a table."""
+    ok = True
+    for name, sql, params in [
+        ("non_urgent_candidates", NON_URGENT_CANDIDATES_SQL,
+         {"w_impact": 1, "w_freshness": 1, "w_proximity": 1, "half_life": 6,
+          "uniqueness": 1, "proximity": 0.8, "freshness": 6, "limit": 25}),
+        ("today_post_history", TODAY_POST_HISTORY_SQL, ()),
+        ("today_post_count", TODAY_POST_COUNT_SQL, ()),
+        ("posts_for_article", POSTS_FOR_ARTICLE_SQL, (1,)),
+    ]:
+        plan = explain(sql, params)
+        uses_index = all(not line.startswith("SCAN") for line in plan)
+        ok = ok and uses_index
+        print(f"[DB] {'OK  ' if uses_index else 'SCAN'} {name}: {' | '.join(plan)}")
+    return ok
+
+
+# === Setup Tables ===
+migrate(get_connection())
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if check_query_plans() else 1)
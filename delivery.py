@@ -0,0 +1,171 @@
+import asyncio
+import random
+import time
+from db import get_connection, transaction
+
+# ------------------------
+#   Delivery Parameters
+# ------------------------
+
+## Messages claimed from the outbox per batch
+BATCH_SIZE = 20
+
+## Sustained send rate and burst size per platform
+RATE_LIMITS = {
+    "telegram": {"per_minute": 20, "burst": 5},
+    "twitter": {"per_minute": 5, "burst": 2},
+}
+
+## Retry schedule: BASE_BACKOFF * 2**attempts seconds (with jitter), capped at MAX_BACKOFF
+BASE_BACKOFF = 30
+MAX_BACKOFF = 60 * 60
+MAX_ATTEMPTS = 8
+
+## Seconds after which a message claimed by a crashed worker is retried
+SENDING_TIMEOUT = 10 * 60
+
+## Seconds the worker sleeps when nothing is due
+POLL_INTERVAL = 5
+
+## Post flag set once a platform accepts the message
+PUBLISHED_FLAGS = {"twitter": "tweet_published", "instagram": "insta_published"}
+
+
+def platforms_for_mode(post_mode):
+    mode = (post_mode or "").lower()
+    if mode == "both":
+        return ["twitter", "telegram"]
+    if mode in ("twitter", "telegram"):
+        return [mode]
+    return []
+
+
+# ------------------------
+#   Outbox
+# ------------------------
+def enqueue_post(post_id, message, platforms):
+    with transaction() as conn:
+        conn.executemany("""
+            INSERT INTO outbox (post_id, platform, message, next_attempt_at)
+            VALUES (?, ?, ?, ?)
+        """, [(post_id, p, message, time.time()) for p in platforms])
+
+
+def claim_due(limit=BATCH_SIZE):
+    """Atomically claim up to limit due messages so concurrent workers never share one."""
+    now = time.time()
+    with transaction() as conn:
+        return conn.execute("""
+            UPDATE outbox SET status = 'sending', next_attempt_at = ?
+            WHERE id IN (
+                SELECT id FROM outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                ORDER BY next_attempt_at LIMIT ?
+            )
+            RETURNING id, post_id, platform, message, attempts
+        """, (now + SENDING_TIMEOUT, now, limit)).fetchall()
+
+
+def mark_sent(message_id, post_id, platform):
+    with transaction() as conn:
+        conn.execute("UPDATE outbox SET status = 'sent', sent_at = CURRENT_TIMESTAMP, last_error = NULL WHERE id = ?",
+                     (message_id,))
+        if platform in PUBLISHED_FLAGS:
+            conn.execute(f"UPDATE posts SET {PUBLISHED_FLAGS[platform]} = 1 WHERE id = ?", (post_id,))
+
+
+def mark_failed(message_id, attempts, error):
+    attempts += 1
+    if attempts >= MAX_ATTEMPTS:
+        status, next_attempt_at = "failed", None
+    else:
+        delay = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempts - 1))
+        status, next_attempt_at = "pending", time.time() + delay * random.uniform(0.8, 1.2)
+    with transaction() as conn:
+        conn.execute("UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                     (status, attempts, next_attempt_at, str(error)[:500], message_id))
+    return status
+
+
+def pending_count():
+    return get_connection().execute("SELECT COUNT(*) FROM outbox WHERE status IN ('pending', 'sending')").fetchone()[0]
+
+
+# ------------------------
+#   Delivery Worker
+# ------------------------
+class TokenBucket:
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DeliveryWorker:
+    """Drains the outbox on one event loop, holding one long-lived client per platform.
+
+    senders maps a platform name to an async function sending one message;
+    it raises on failure so the message is retried with backoff.
+    """
+
+    def __init__(self, senders):
+        self.senders = senders
+        self.buckets = {p: TokenBucket(**RATE_LIMITS[p]) for p in senders if p in RATE_LIMITS}
+        self.sent = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+
+    async def _send_platform(self, platform, rows):
+        sender = self.senders.get(platform)
+        bucket = self.buckets.get(platform)
+        for message_id, post_id, _, message, attempts in rows:
+            try:
+                if sender is None:
+                    raise RuntimeError(f"no sender configured for {platform}")
+                if bucket:
+                    await bucket.acquire()
+                await sender(message)
+                mark_sent(message_id, post_id, platform)
+                self.sent += 1
+                print(f"[DELIVERY] ✅ {platform} post {post_id}")
+            except Exception as e:
+                status = mark_failed(message_id, attempts, e)
+                self.failed += 1
+                print(f"[DELIVERY ERROR] {platform} post {post_id} ({status}) → {e}")
+
+    async def deliver_batch(self):
+        """Send one batch of due messages, platforms in parallel; returns how many were claimed."""
+        rows = claim_due()
+        if not rows:
+            return 0
+        start = time.perf_counter()
+        by_platform = {}
+        for row in rows:
+            by_platform.setdefault(row[2], []).append(row)
+        await asyncio.gather(*(self._send_platform(p, r) for p, r in by_platform.items()))
+        print(f"[DELIVERY] batch of {len(rows)} in {time.perf_counter() - start:.1f}s — {self.summary()}")
+        return len(rows)
+
+    async def run(self, stopping):
+        """Deliver until stopping is set, then flush whatever is already due."""
+        while True:
+            claimed = await self.deliver_batch()
+            if stopping.is_set() and not claimed:
+                return
+            if not claimed:
+                await asyncio.sleep(POLL_INTERVAL)
+
+    def summary(self):
+        minutes = max((time.monotonic() - self.started_at) / 60, 1e-9)
+        return f"{self.sent} sent, {self.failed} failed, {self.sent / minutes:.1f}/min, {pending_count()} pending"
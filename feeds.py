@@ -0,0 +1,221 @@
+import calendar
+import json
+import time
+import requests
+import feedparser
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from db import get_connection, transaction
+import metrics
+
+# ------------------------
+#   Feed Parameters
+# ------------------------
+FEEDS = [
+    "https://www.espn.com/espn/rss/news",
+    "https://www.skysports.com/rss/12040",
+    "https://feeds.bbci.co.uk/sport/football/rss.xml",
+    "https://www.fourfourtwo.com/feeds.xml"
+]
+
+## Maximum number of feeds downloaded at the same time
+MAX_FEED_WORKERS = 8
+
+## Seconds before a single feed request is abandoned
+FEED_TIMEOUT = 10
+
+## Hours after publication an entry is still admitted
+MAX_AGE_HOURS = 12
+
+## Per-feed overrides of MAX_AGE_HOURS, e.g. {"https://www.fourfourtwo.com/feeds.xml": 24}
+FEED_MAX_AGE_HOURS = {}
+
+## Most entry GUIDs remembered per feed
+RECENT_GUIDS = 500
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_FEED_WORKERS))
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_FEED_WORKERS))
+
+
+# ------------------------
+#   Conditional GET State
+# ------------------------
+def load_feed_states(feed_urls):
+    cursor = get_connection().execute(
+        f"SELECT url, etag, last_modified, content_length FROM feeds WHERE url IN ({','.join('?' * len(feed_urls))})",
+        list(feed_urls),
+    )
+    return {row[0]: {"etag": row[1], "last_modified": row[2], "content_length": row[3] or 0}
+            for row in cursor.fetchall()}
+
+
+def save_feed_states(results):
+    with transaction() as conn:
+        conn.executemany("""
+            INSERT INTO feeds (url, etag, last_modified, content_length, last_fetched_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                content_length = excluded.content_length,
+                last_fetched_at = excluded.last_fetched_at
+        """, [
+            (r["url"], r["etag"], r["last_modified"], r["content_length"])
+            for r in results if r["status"] in (200, 304)
+        ])
+
+
+# ------------------------
+#   High-Water Marks
+# ------------------------
+def parse_utc(text):
+    """Parse an RSS (RFC 822) or SQLite timestamp as UTC; None if it is neither."""
+    if not text:
+        return None
+    try:
+        dt = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def max_age_hours(feed_url):
+    return FEED_MAX_AGE_HOURS.get(feed_url, MAX_AGE_HOURS)
+
+
+def load_feed_marks(feed_urls):
+    """Latest published timestamp and recent entry GUIDs (GUID → published) per feed."""
+    cursor = get_connection().execute(
+        f"SELECT url, hwm_published, recent_guids FROM feeds WHERE url IN ({','.join('?' * len(feed_urls))})",
+        list(feed_urls),
+    )
+    marks = {url: {"published": 0.0, "guids": {}} for url in feed_urls}
+    for url, published, guids in cursor.fetchall():
+        marks[url] = {"published": published or 0.0, "guids": json.loads(guids) if guids else {}}
+    return marks
+
+
+def save_feed_marks(marks):
+    with transaction() as conn:
+        conn.executemany("""
+            INSERT INTO feeds (url, hwm_published, recent_guids) VALUES (?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                hwm_published = excluded.hwm_published,
+                recent_guids = excluded.recent_guids
+        """, [(url, mark["published"], json.dumps(mark["guids"])) for url, mark in marks.items()])
+
+
+def new_entries(feed_url, entries, mark, now=None):
+    """Yield (entry, published timestamp) for entries not seen before and within the feed's max age.
+
+    Known GUIDs are skipped before any date handling. GUIDs are only kept for
+    the max age below the high-water mark; an unknown entry published before
+    that was seen (or judged stale) in an earlier cycle and is skipped by the
+    mark alone. The mark is updated in place.
+    """
+    now = now or time.time()
+    max_age = max_age_hours(feed_url) * 3600
+    cutoff = now - max_age
+    floor = mark["published"] - max_age
+    guids = mark["guids"]
+    for entry in entries:
+        guid = entry.get("id") or entry.get("link", "")
+        if guid in guids:
+            continue
+        parsed = entry.get("published_parsed")
+        published = calendar.timegm(parsed) if parsed else now
+        if published <= floor:
+            continue
+        guids[guid] = published
+        mark["published"] = max(mark["published"], published)
+        if published < cutoff:
+            metrics.inc("articles_total", outcome="skipped", reason="stale")
+            continue
+        yield entry, published
+
+    floor = mark["published"] - max_age
+    keep = sorted((g for g, published in guids.items() if published > floor), key=guids.get, reverse=True)
+    mark["guids"] = {g: guids[g] for g in keep[:RECENT_GUIDS]}
+
+
+# ------------------------
+#   Fetching
+# ------------------------
+def fetch_feed(feed_url, state=None):
+    """Download one feed, sending the stored validators so unchanged feeds answer 304."""
+    state = state or {}
+    headers = dict(HEADERS)
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    result = {
+        "url": feed_url,
+        "status": None,
+        "entries": [],
+        "elapsed": 0.0,
+        "bytes": 0,
+        "bytes_saved": 0,
+        "etag": state.get("etag"),
+        "last_modified": state.get("last_modified"),
+        "content_length": state.get("content_length", 0),
+    }
+    start = time.perf_counter()
+    try:
+        r = _session.get(feed_url, headers=headers, timeout=FEED_TIMEOUT)
+        result["status"] = r.status_code
+        if r.status_code == 304:
+            result["bytes_saved"] = result["content_length"]
+        else:
+            r.raise_for_status()
+            result["bytes"] = len(r.content)
+            result["content_length"] = len(r.content)
+            result["etag"] = r.headers.get("ETag")
+            result["last_modified"] = r.headers.get("Last-Modified")
+            parsed = feedparser.parse(r.content, response_headers={
+                "content-location": feed_url,
+                "content-type": r.headers.get("Content-Type", ""),
+            })
+            result["entries"] = parsed.entries
+    except Exception as e:
+        print(f"[RSS ERROR] {feed_url} → {e}")
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def fetch_feeds(feed_urls=None, max_workers=MAX_FEED_WORKERS):
+    """Poll all feeds concurrently and return one result dict per feed."""
+    feed_urls = list(feed_urls or FEEDS)
+    if not feed_urls:
+        return []
+    states = load_feed_states(feed_urls)
+
+    results = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(feed_urls))) as pool:
+        futures = [pool.submit(fetch_feed, url, states.get(url)) for url in feed_urls]
+        for future in as_completed(futures):
+            r = future.result()
+            results.append(r)
+            metrics.observe("stage_seconds", r["elapsed"], stage="fetch_feed")
+            metrics.inc("feed_requests_total", status=r["status"] or "error")
+            if r["status"] == 304:
+                print(f"[RSS] {r['url']} → 304 not modified in {r['elapsed']:.2f}s "
+                      f"(saved {r['bytes_saved'] / 1024:.1f} KB)")
+            elif r["status"] == 200:
+                print(f"[RSS] {r['url']} → {r['status']} {len(r['entries'])} entries, "
+                      f"{r['bytes'] / 1024:.1f} KB in {r['elapsed']:.2f}s")
+
+    save_feed_states(results)
+    print(f"[RSS] {len(results)} feeds in {time.perf_counter() - start:.2f}s, "
+          f"{sum(r['bytes'] for r in results) / 1024:.1f} KB downloaded, "
+          f"{sum(r['bytes_saved'] for r in results) / 1024:.1f} KB saved")
+    return results
@@ -0,0 +1,115 @@
+import os
+import socket
+import time
+from db import transaction
+
+# ------------------------
+#   Worker Parameters
+# ------------------------
+
+## Name this process claims articles under; must be unique across workers sharing the DB
+WORKER_ID = os.environ.get("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+## Feed sharding: worker WORKER_INDEX of WORKER_COUNT polls only its share of the feeds
+WORKER_INDEX = int(os.environ.get("WORKER_INDEX", 0))
+WORKER_COUNT = int(os.environ.get("WORKER_COUNT", 1))
+
+## Seconds an article stays claimed without a renew; a crashed worker's claims expire after this
+LEASE_SECONDS = 10 * 60
+
+# Claims this worker made before STARTED_AT belong to a previous run under the same WORKER_ID
+STARTED_AT = time.time()
+
+
+def shard_feeds(feed_urls, index=WORKER_INDEX, count=WORKER_COUNT):
+    """Return this worker's share of feed_urls, dealt round-robin over the sorted URLs.
+
+    Every worker gets at least one feed while count <= len(feed_urls), and the
+    split is the same in every process given the same feed list.
+    """
+    if count <= 1:
+        return list(feed_urls)
+    return sorted(feed_urls)[index::count]
+
+
+# ------------------------
+#   Article Leases
+# ------------------------
+# A claim is only granted on an unposted article that is unclaimed, already
+# ours, or whose lease has expired. Each is a single UPDATE, so two workers
+# can never both hold the same article.
+_CLAIMABLE = "posted = 0 AND (claimed_by IS NULL OR claimed_by = ? OR lease_expires < ?)"
+
+
+def claim_articles(urls, worker_id=WORKER_ID, lease=LEASE_SECONDS):
+    """Claim not-yet-scored articles by URL for scraping and scoring.
+
+    Returns the set of URLs this worker now holds.
+    """
+    urls = list(urls)
+    if not urls:
+        return set()
+    now = time.time()
+    with transaction() as conn:
+        rows = conn.execute(f"""
+            UPDATE articles SET claimed_by = ?, lease_expires = ?
+            WHERE url IN ({','.join('?' * len(urls))}) AND proximity = -1 AND {_CLAIMABLE}
+            RETURNING url
+        """, [worker_id, now + lease, *urls, worker_id, now]).fetchall()
+    return {row[0] for row in rows}
+
+
+def claim_article_id(article_id, worker_id=WORKER_ID, lease=LEASE_SECONDS):
+    """Claim one article by id; returns True when this worker now holds it."""
+    now = time.time()
+    with transaction() as conn:
+        cursor = conn.execute(f"""
+            UPDATE articles SET claimed_by = ?, lease_expires = ?
+            WHERE id = ? AND {_CLAIMABLE}
+        """, (worker_id, now + lease, article_id, worker_id, now))
+    return cursor.rowcount == 1
+
+
+def renew(url, worker_id=WORKER_ID, lease=LEASE_SECONDS):
+    """Extend our lease on an article; returns False if the claim was lost."""
+    with transaction() as conn:
+        cursor = conn.execute("UPDATE articles SET lease_expires = ? WHERE url = ? AND claimed_by = ?",
+                              (time.time() + lease, url, worker_id))
+    return cursor.rowcount == 1
+
+
+def release(url, worker_id=WORKER_ID):
+    """Give up our claim so any worker may pick the article (e.g. for non-urgent posting)."""
+    with transaction() as conn:
+        conn.execute("UPDATE articles SET claimed_by = NULL, lease_expires = NULL WHERE url = ? AND claimed_by = ?",
+                     (url, worker_id))
+
+
+def claim_abandoned(limit=50, worker_id=WORKER_ID, lease=LEASE_SECONDS):
+    """Take over unscored articles whose worker's lease expired (e.g. it crashed mid-article).
+
+    Our own expired claims are skipped unless they predate this run: those
+    articles are still waiting in our queues, and the stage that dequeues
+    them renews the lease. Returns rows of (id, title, url, published_at, received_at).
+    """
+    now = time.time()
+    with transaction() as conn:
+        return conn.execute("""
+            UPDATE articles SET claimed_by = ?, lease_expires = ?
+            WHERE id IN (
+                SELECT id FROM articles
+                WHERE claimed_by IS NOT NULL AND lease_expires < ? AND posted = 0 AND proximity = -1
+                  AND (claimed_by != ? OR lease_expires < ?)
+                LIMIT ?
+            )
+            RETURNING id, title, url, published_at, received_at
+        """, (worker_id, now + lease, now, worker_id, STARTED_AT + lease, limit)).fetchall()
+
+
+def mark_posted(conn, url):
+    """Flag an article as posted inside the caller's transaction; False if another worker already did."""
+    cursor = conn.execute("""
+        UPDATE articles SET posted = 1, claimed_by = NULL, lease_expires = NULL
+        WHERE url = ? AND posted = 0
+    """, (url,))
+    return cursor.rowcount == 1
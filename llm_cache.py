@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from db import get_connection, transaction
+
+# ------------------------
+#   Cache Parameters
+# ------------------------
+
+## Seconds a cached LLM answer stays valid unless the caller asks for less
+LLM_CACHE_TTL = 24 * 3600
+
+## Rows kept after eviction; least recently used rows are dropped first
+LLM_CACHE_MAX_ENTRIES = 20_000
+
+## Run expiry/size eviction once every this many writes
+EVICT_EVERY = 100
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFC", value).split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def template_fingerprint(template):
+    """Short hash of a prompt template's text, so editing a prompt invalidates its entries."""
+    text = "".join(getattr(getattr(m, "prompt", None), "template", str(m))
+                   for m in getattr(template, "messages", [template]))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMCache:
+    """Persistent LLM-result cache keyed by (prompt template, model, normalized inputs)."""
+
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(template_name, template, model, inputs):
+        payload = json.dumps({
+            "template": template_name,
+            "fingerprint": template_fingerprint(template),
+            "model": model,
+            "inputs": _normalize(inputs),
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        row = get_connection().execute(
+            "SELECT response FROM llm_cache WHERE key = ? AND created_at >= ?", (key, now - ttl)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        with transaction() as conn:
+            conn.execute("UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, template_name, model, response):
+        now = time.time()
+        with transaction() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO llm_cache (key, template, model, response, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (key, template_name, model, response, now, now))
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        with transaction() as conn:
+            expired = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+            overflow = conn.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,)).rowcount
+        if expired or overflow:
+            print(f"[LLM CACHE] Evicted {expired} expired and {overflow} least-recently-used entries")
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
@@ -0,0 +1,221 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# ------------------------
+#   Metrics Parameters
+# ------------------------
+
+## Port serving the Prometheus text endpoint at /metrics; 0 disables it
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9108))
+
+## Prefix added to every exported metric name
+NAMESPACE = "sporttweet"
+
+## Histogram bucket upper bounds for stage latencies, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+## Histogram bucket upper bounds for LLM prompt/answer sizes, in tokens
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+## Histogram bucket upper bounds for downloaded page sizes, in bytes
+BYTES_BUCKETS = (16384, 65536, 131072, 262144, 524288, 1048576, 2097152, 4194304)
+
+_HELP = {
+    "stage_seconds": "Wall time spent in each pipeline stage",
+    "articles_total": "Feed entries by outcome (seen, new, skipped, scored, posted)",
+    "feed_requests_total": "Feed requests by HTTP status",
+    "llm_requests_total": "LLM calls by prompt template and cache result",
+    "llm_prompt_tokens": "Prompt tokens evaluated by Ollama per call",
+    "llm_eval_tokens": "Tokens generated by Ollama per call",
+    "llm_eval_seconds": "Ollama generation time per call",
+    "llm_last_prompt_tokens": "Prompt tokens of the latest call per template",
+    "queue_depth": "Items waiting in each pipeline queue",
+    "llm_num_ctx": "Context window requested for the latest call per template",
+    "scrape_cpu_seconds": "CPU time spent decoding and parsing each article page",
+    "scrape_bytes": "Bytes of each article page read before extraction stopped",
+}
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# ------------------------
+#   Recording
+# ------------------------
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+        i = bisect_left(h["buckets"], value)
+        if i < len(h["counts"]):
+            h["counts"][i] += 1
+        h["sum"] += value
+        h["count"] += 1
+
+
+class timed:
+    """Record the wall time of a block or function in stage_seconds{stage=...}.
+
+    Works as a context manager and as a decorator for plain, async and
+    generator functions (a generator is timed until it is exhausted or closed).
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._local.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe("stage_seconds", time.perf_counter() - self._local.start, stage=self.stage)
+        return False
+
+    def __call__(self, fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe("stage_seconds", time.perf_counter() - start, stage=self.stage)
+            return async_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return (yield from fn(*args, **kwargs))
+                finally:
+                    observe("stage_seconds", time.perf_counter() - start, stage=self.stage)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe("stage_seconds", time.perf_counter() - start, stage=self.stage)
+        return wrapper
+
+
+def record_llm(template_name, message):
+    """Record token counts and generation time from an Ollama chat answer's response_metadata."""
+    meta = getattr(message, "response_metadata", None) or {}
+    inc("llm_requests_total", template=template_name, cache="miss")
+    if meta.get("prompt_eval_count") is not None:
+        observe("llm_prompt_tokens", meta["prompt_eval_count"], buckets=TOKEN_BUCKETS, template=template_name)
+        set_gauge("llm_last_prompt_tokens", meta["prompt_eval_count"], template=template_name)
+    if meta.get("eval_count") is not None:
+        observe("llm_eval_tokens", meta["eval_count"], buckets=TOKEN_BUCKETS, template=template_name)
+    if meta.get("eval_duration") is not None:
+        observe("llm_eval_seconds", meta["eval_duration"] / 1e9, template=template_name)
+
+
+# ------------------------
+#   Export
+# ------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        histograms = sorted((k, dict(v, counts=list(v["counts"]))) for k, v in _histograms.items())
+
+    lines = []
+    typed = set()
+
+    def header(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# HELP {NAMESPACE}_{name} {_HELP.get(name, name)}")
+            lines.append(f"# TYPE {NAMESPACE}_{name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{NAMESPACE}_{name}{_labels(labels)} {value}")
+    for (name, labels), value in gauges:
+        header(name, "gauge")
+        lines.append(f"{NAMESPACE}_{name}{_labels(labels)} {value}")
+    for (name, labels), h in histograms:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(h["buckets"], h["counts"]):
+            cumulative += count
+            lines.append(f"{NAMESPACE}_{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{NAMESPACE}_{name}_bucket{_labels(labels, [('le', '+Inf')])} {h['count']}")
+        lines.append(f"{NAMESPACE}_{name}_sum{_labels(labels)} {h['sum']:.6f}")
+        lines.append(f"{NAMESPACE}_{name}_count{_labels(labels)} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def serve(port=METRICS_PORT):
+    """Serve /metrics from a daemon thread; returns the server, or None when disabled."""
+    if not port:
+        return None
+    # Imported here so processes that only record metrics don't pay for http.server
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = http.server.ThreadingHTTPServer(("", port), MetricsHandler)
+    except OSError as e:
+        # Typically a second worker on the same host without its own METRICS_PORT
+        print(f"[METRICS] port {port} unavailable ({e.strerror}), metrics disabled for this worker")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[METRICS] serving http://localhost:{server.server_port}/metrics")
+    return server
@@ -1,10 +1,8 @@
-from langchain_core.output_parsers.json import JsonOutputParser
-from langchain.prompts import ChatPromptTemplate
-from langchain_community.chat_models import ChatOllama
-
 # === Prompt Templates ===
+# Kept as plain text; the ChatPromptTemplate objects (and langchain_core) are
+# built on first access, see __getattr__ below.
 
-TWITTER_PROMPT_TEMPLATE = ChatPromptTemplate.from_template("""
+TWITTER_PROMPT = """
 You are an expert football journalist and social media strategist for Twitter (X).
 
 Write a **concise, high-impact tweet** for the sports article below.
@@ -19,9 +17,9 @@ Write a **concise, high-impact tweet** for the sports article below.
 **CONTENT:** {content}
 
 Respond ONLY with the tweet text.
-""")
+"""
 
-SCORING_PROMPT_TEMPLATE = ChatPromptTemplate.from_template("""
+_SCORING_STEPS = """
 You are a sports news classifier. Given a news article (title + content), determine if it is about *association football (soccer)* (not American football or other sports). 
 Then evaluate its proximity, freshness, and impact.
 
@@ -57,7 +55,9 @@ If “soccer_relevance” is false, set impact = 0. Otherwise assess:
 * **1–3**: Minor relevance to general soccer audience; niche, local, fantasy, betting, etc.  
 * **0**: Not about soccer.
 
----
+"""
+
+SCORING_PROMPT = _SCORING_STEPS + """---
 
 Now classify the following:
 
@@ -73,9 +73,36 @@ Respond only with a JSON object:
   "freshness": <0–10>,
   "impact": <0–10>
 }}
-""")
+"""
+
+COMBINED_SCORING_PROMPT = _SCORING_STEPS + """### STEP 5: Uniqueness (0 or 1)
+Compare the article title with the previously posted items below.
+- **1**: Meaningfully different news from every previously posted item (or there are none).
+- **0**: A duplicate or rewording of one of them.
+
+---
+
+Now classify the following:
+
+Title: {title}  
+Content: {content}  
+current_datetime: {current_datetime}
+article_received_datetime: {article_received_datetime}
+
+Previously posted items:
+{history}
+
+Respond only with a JSON object:
+{{
+  "soccer_relevance": true or false,
+  "proximity": <float between 0 and 1.0>,
+  "freshness": <0–10>,
+  "impact": <0–10>,
+  "uniqueness": 0 or 1
+}}
+"""
 
-UNIQUENESS_PROMPT_TEMPLATE = ChatPromptTemplate.from_template("""
+UNIQUENESS_PROMPT = """
 You are helping decide whether a news item is unique compared to previously posted ones.
 
 Current news:
@@ -90,4 +117,19 @@ Answer only in JSON:
 {{
   "uniqueness": 0 or 1
 }}
-""")
\ No newline at end of file
+"""
+
+_TEMPLATES = {
+    "TWITTER_PROMPT_TEMPLATE": TWITTER_PROMPT,
+    "SCORING_PROMPT_TEMPLATE": SCORING_PROMPT,
+    "COMBINED_SCORING_PROMPT_TEMPLATE": COMBINED_SCORING_PROMPT,
+    "UNIQUENESS_PROMPT_TEMPLATE": UNIQUENESS_PROMPT,
+}
+
+
+def __getattr__(name):
+    if name in _TEMPLATES:
+        from langchain_core.prompts import ChatPromptTemplate
+        template = globals()[name] = ChatPromptTemplate.from_template(_TEMPLATES[name])
+        return template
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
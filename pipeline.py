@@ -0,0 +1,234 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from feeds import FEEDS, parse_utc
+from scheduler import FeedScheduler
+from delivery import DeliveryWorker
+import leases
+import content_store
+import metrics
+from scraper import fetch_article_text
+from utils import (fetch_top_sports_news, admit_news_items, store_article_content, ascore_article_with_llm,
+                   get_today_post_history, get_today_post_count, should_post_instant, post_article,
+                   decide_non_urgent_posts, post_non_urgent, promote_orphaned_stories, llm_cache, story_clusters,
+                   DAILY_QUOTA, UNIQUENESS_MODE, SENDERS)
+
+# ------------------------
+#   Pipeline Parameters
+# ------------------------
+
+## Threads downloading article pages
+SCRAPE_WORKERS = 8
+
+## Scoring requests in flight against Ollama at once
+LLM_PARALLELISM = 2
+
+## Capacity of each queue between stages; a full queue blocks the stage feeding it
+QUEUE_SIZE = 64
+
+## Minimum seconds between two non-urgent selection passes
+NON_URGENT_INTERVAL = 5 * 60
+
+## Seconds between two content retention/compaction runs
+COMPACT_INTERVAL = 24 * 3600
+
+_STOP = object()
+
+
+class Pipeline:
+    """fetch → scrape → score → post, with bounded queues between the stages.
+
+    The fetch stage runs on the caller's thread. Scraping uses a thread pool,
+    scoring runs LLM_PARALLELISM ainvoke calls on one event loop, and posting
+    (instant and non-urgent) is serialized on a single thread so the daily
+    quota is respected. Posts land in the outbox, which a delivery worker
+    drains on its own event loop.
+
+    Several pipelines may share one database: each article is leased to the
+    worker that admitted it (see leases.py), and WORKER_INDEX/WORKER_COUNT
+    split the feeds between them.
+    """
+
+    def __init__(self, scrape_workers=SCRAPE_WORKERS, llm_parallelism=LLM_PARALLELISM, queue_size=QUEUE_SIZE):
+        self.scrape_q = queue.Queue(queue_size)
+        self.score_q = queue.Queue(queue_size)
+        self.post_q = queue.Queue(queue_size)
+        self.llm_parallelism = llm_parallelism
+        self.scheduler = FeedScheduler(leases.shard_feeds(FEEDS))
+        self._non_urgent_at = 0.0
+        self._compacted_at = 0.0
+        self.stopping = threading.Event()
+        self._scrapers = [threading.Thread(target=self._scrape_worker, name=f"scrape-{i}", daemon=True)
+                          for i in range(scrape_workers)]
+        self._scorer = threading.Thread(target=lambda: asyncio.run(self._score_stage()), name="score", daemon=True)
+        self._poster = threading.Thread(target=self._post_worker, name="post", daemon=True)
+        self.delivery = DeliveryWorker(SENDERS)
+        self._delivery_done = threading.Event()
+        self._deliverer = threading.Thread(target=lambda: asyncio.run(self.delivery.run(self._delivery_done)),
+                                           name="deliver", daemon=True)
+
+    def start(self):
+        for t in self._scrapers + [self._scorer, self._poster, self._deliverer]:
+            t.start()
+        return self
+
+    # ------------------------
+    #   Stages
+    # ------------------------
+    def fetch_once(self, feed_urls=None):
+        feed_urls = feed_urls or self.scheduler.feed_urls
+        marks = {}
+        entries = list(fetch_top_sports_news(feed_urls, marks))
+        # Cadence follows what each feed published, not what survived the prefilter, clustering or claims
+        new_per_feed = Counter(item["feed"] for item in entries)
+        new_items = admit_news_items(entries, marks)
+        for url in feed_urls:
+            if url in self.scheduler.state:
+                self.scheduler.record(url, new_per_feed[url])
+        for item in new_items.values():
+            self.scrape_q.put(item)
+        for item in self._items(leases.claim_abandoned()):
+            print(f"[PIPELINE] taking over abandoned article: {item['title']}")
+            self.scrape_q.put(item)
+        for item in self._items(promote_orphaned_stories()):
+            print(f"[PIPELINE] trying another source for the story: {item['title']}")
+            self.scrape_q.put(item)
+        if time.time() - self._non_urgent_at >= NON_URGENT_INTERVAL:
+            self._non_urgent_at = time.time()
+            self.post_q.put(("non_urgent", None))
+        for name, q in (("scrape", self.scrape_q), ("score", self.score_q), ("post", self.post_q)):
+            metrics.set_gauge("queue_depth", q.qsize(), queue=name)
+        print(f"[PIPELINE] queued {len(new_items)} new items "
+              f"(scrape={self.scrape_q.qsize()} score={self.score_q.qsize()} post={self.post_q.qsize()})")
+
+    @staticmethod
+    def _items(rows):
+        """Queue items for claimed article rows of (id, title, url, published_at, received_at)."""
+        for _, title, url, published, received_at in rows:
+            # Freshness is judged from the publish time, as for entries fresh from the feed
+            published_dt = parse_utc(published) or parse_utc(received_at)
+            yield {"title": title, "url": url, "published": published, "published_dt": published_dt}
+
+    def _scrape_worker(self):
+        while True:
+            item = self.scrape_q.get()
+            if item is _STOP:
+                return
+            if not leases.renew(item["url"]):
+                print(f"[SKIP] Lost the claim on {item['url']}")
+                continue
+            try:
+                content = fetch_article_text(item["url"])
+                if content:
+                    store_article_content(item["url"], content)
+                if not content or len(content.strip()) < 400:
+                    print(f"[SKIP] Content too short.")
+                    metrics.inc("articles_total", outcome="skipped", reason="short")
+                    leases.release(item["url"])
+                    continue
+                self.score_q.put((item, content))
+            except Exception as e:
+                print(f"[SCRAPE ERROR] {item['url']} → {e}")
+                leases.release(item["url"])
+
+    async def _score_stage(self):
+        slots = asyncio.Semaphore(self.llm_parallelism)
+        tasks = set()
+        while True:
+            # Take a slot before taking a job so unscored work stays in the bounded queue
+            await slots.acquire()
+            job = await asyncio.to_thread(self.score_q.get)
+            if job is _STOP:
+                slots.release()
+                break
+            task = asyncio.create_task(self._score(job, slots))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    async def _score(self, job, slots):
+        item, content = job
+        try:
+            if not await asyncio.to_thread(leases.renew, item["url"]):
+                print(f"[SKIP] Lost the claim on {item['url']}")
+                return
+            scores = await ascore_article_with_llm(
+                url=item["url"],
+                title=item["title"],
+                content=content,
+                history=get_today_post_history() if UNIQUENESS_MODE == "llm" else None,
+                article_received_datetime=item["published_dt"]
+            )
+            if should_post_instant(scores):
+                await asyncio.to_thread(self.post_q.put, ("instant", (item, content)))
+            else:
+                leases.release(item["url"])
+        except Exception as e:
+            print(f"[PROCESS ERROR] {item['url']} → {e}")
+        finally:
+            slots.release()
+
+    def _post_worker(self):
+        while True:
+            job = self.post_q.get()
+            if job is _STOP:
+                return
+            kind, payload = job
+            try:
+                if kind == "instant":
+                    item, content = payload
+                    if not leases.renew(item["url"]):
+                        print(f"[SKIP] Lost the claim on {item['url']}")
+                    elif get_today_post_count() < DAILY_QUOTA:
+                        post_article(item["url"], item["title"], content)
+                        delay = (datetime.now(timezone.utc) - item["published_dt"]).total_seconds()
+                        print(f"[LATENCY] published → posted in {delay / 60:.1f} min: {item['title']}")
+                    else:
+                        leases.release(item["url"])
+                else:
+                    for article_id in decide_non_urgent_posts():
+                        post_non_urgent(article_id)
+            except Exception as e:
+                print(f"[POST ERROR] {e}")
+
+    # ------------------------
+    #   Run & Shutdown
+    # ------------------------
+    def run_forever(self):
+        while not self.stopping.is_set():
+            due = self.scheduler.due()
+            if due:
+                print(f"[{datetime.now()}]===[RUNNING]=== {len(due)} feeds due")
+                try:
+                    self.fetch_once(due)
+                except Exception as e:
+                    print(f"[MAIN ERROR] {e}")
+                print(f"[LLM CACHE] {llm_cache.summary()}")
+                print(f"[CLUSTER] {story_clusters().summary()}")
+                print(f"[SCHEDULE] {self.scheduler.summary()}")
+            if time.time() - self._compacted_at >= COMPACT_INTERVAL:
+                self._compacted_at = time.time()
+                try:
+                    content_store.compact()
+                except Exception as e:
+                    print(f"[COMPACT ERROR] {e}")
+            self.stopping.wait(self.scheduler.seconds_until_next())
+
+    def shutdown(self):
+        """Stop fetching and drain every queued and in-flight item, stage by stage."""
+        self.stopping.set()
+        start = time.perf_counter()
+        for _ in self._scrapers:
+            self.scrape_q.put(_STOP)
+        for t in self._scrapers:
+            t.join()
+        self.score_q.put(_STOP)
+        self._scorer.join()
+        self.post_q.put(_STOP)
+        self._poster.join()
+        self._delivery_done.set()
+        self._deliverer.join()
+        print(f"[PIPELINE] drained in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,75 @@
+import re
+
+# ------------------------
+#   Entity Lexicon
+# ------------------------
+# Mirrors the entities SCORING_PROMPT_TEMPLATE asks the LLM to look for.
+SOCCER_TERMS = [
+    # Clubs
+    "Manchester United", "Man United", "Man Utd", "Manchester City", "Man City", "Real Madrid",
+    "Barcelona", "Barca", "Bayern Munich", "Bayern", "Juventus", "Paris Saint-Germain", "Arsenal",
+    "Liverpool", "Chelsea", "Tottenham", "AC Milan", "Inter Milan", "Napoli", "Roma",
+    "Dortmund", "Atletico", "Atlético", "Newcastle", "Aston Villa", "Everton", "West Ham",
+    "Benfica", "Porto", "Ajax", "Celtic", "Leverkusen", "Sevilla", "Marseille",
+    # Players and managers
+    "Messi", "Ronaldo", "Mbappe", "Mbappé", "Haaland", "Salah", "Neymar", "De Bruyne",
+    "Harry Kane", "Donnarumma", "Bellingham", "Vinicius", "Lewandowski", "Guardiola",
+    "Arteta", "Klopp", "Ancelotti",
+    # Competitions
+    "Premier League", "La Liga", "Serie A", "Bundesliga", "Ligue 1", "Champions League",
+    "Europa League", "Conference League", "World Cup", "Copa America", "Copa América",
+    "Euro 20\\d\\d", "FA Cup", "Carabao Cup", "EFL", "Scottish Premiership",
+    "Eredivisie", "Club World Cup", "Nations League",
+    # Generic football vocabulary
+    "soccer", "footballer", "goalkeeper", "striker", "midfielder", "centre-back", "winger",
+    "transfer window", "penalty shootout", "hat-trick", "clean sheet", "relegation",
+]
+
+## Matched case-sensitively so they don't fire on ordinary words
+SOCCER_ACRONYMS = ["FIFA", "UEFA", "CAF", "CONMEBOL", "CONCACAF", "PSG", "MLS", "USMNT", "USWNT", "VAR"]
+
+## Soccer names shared with other sports (NBA Spurs, NHL Rangers, NFL AFC); count only next to a soccer term
+AMBIGUOUS_TERMS = ["Spurs", "Rangers"]
+AMBIGUOUS_ACRONYMS = ["AFC"]
+
+OFF_TOPIC_TERMS = [
+    "quarterback", "touchdown", "wide receiver", "linebacker", "Super Bowl",
+    "basketball", "point guard", "slam dunk", "baseball", "home run", "pitcher", "World Series",
+    "hockey", "Stanley Cup", "horse racing", "racehorse", "jockey", "Kentucky Derby", "golf",
+    "PGA Tour", "tennis", "Wimbledon", "Formula 1", "Formula One", "Grand Prix", "NASCAR",
+    "boxing", "heavyweight", "cricket", "rugby", "college football", "March Madness",
+]
+OFF_TOPIC_ACRONYMS = ["NFL", "NBA", "WNBA", "MLB", "NHL", "NCAA", "UFC", "MMA", "PGA", "LPGA", "F1"]
+
+
+def _compile(terms, acronyms):
+    words = "|".join(t if "\\" in t else re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?i:\b(?:{words})\b)|\b(?:{'|'.join(acronyms)})\b")
+
+
+_SOCCER_RE = _compile(SOCCER_TERMS, SOCCER_ACRONYMS)
+_AMBIGUOUS_RE = _compile(AMBIGUOUS_TERMS, AMBIGUOUS_ACRONYMS)
+_OFF_TOPIC_RE = _compile(OFF_TOPIC_TERMS, OFF_TOPIC_ACRONYMS)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+# ------------------------
+#   Pre-filter
+# ------------------------
+def check(title, summary=""):
+    """Decide whether an RSS entry is worth scraping and scoring.
+
+    Returns (keep, reason). An entry is dropped only when it names another
+    sport and nothing soccer-specific; entries matching neither lexicon are
+    kept and left to the LLM. Ambiguous names only count alongside a soccer
+    term, so on their own they neither keep nor drop an entry.
+    """
+    text = f"{title}\n{_TAG_RE.sub(' ', summary or '')}"
+    soccer = _SOCCER_RE.findall(text)
+    if soccer:
+        soccer += _AMBIGUOUS_RE.findall(text)
+        return True, f"soccer: {', '.join(sorted(set(soccer)))}"
+    off_topic = _OFF_TOPIC_RE.findall(text)
+    if off_topic:
+        return False, f"prefilter: off-topic ({', '.join(sorted(set(off_topic)))})"
+    return True, "no lexicon match"
@@ -0,0 +1,117 @@
+import time
+from db import get_connection, transaction
+
+# ------------------------
+#   Scheduler Parameters
+# ------------------------
+
+## Bounds for the per-feed polling interval, in seconds
+MIN_INTERVAL = 60
+MAX_INTERVAL = 30 * 60
+DEFAULT_INTERVAL = 5 * 60
+
+## Interval growth after a poll that brought nothing new
+BACKOFF = 1.25
+
+## Weight of the latest observed gap between new entries in the moving average
+SMOOTHING = 0.3
+
+## Polls aim to happen this many times per average gap between new entries
+POLLS_PER_GAP = 2
+
+## Cap on feed requests across all feeds
+MAX_POLLS_PER_MINUTE = 30
+
+
+def _clamp(value):
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, value))
+
+
+class FeedScheduler:
+    """Adaptive per-feed polling, persisted in the feeds table.
+
+    Each feed keeps a moving average of the gap between its new entries and
+    is polled POLLS_PER_GAP times per gap; feeds that keep coming back empty
+    back off towards MAX_INTERVAL. A token bucket caps the overall rate.
+    """
+
+    def __init__(self, feed_urls, max_per_minute=MAX_POLLS_PER_MINUTE):
+        self.feed_urls = list(feed_urls)
+        self.max_per_minute = max_per_minute
+        self._tokens = float(max_per_minute)
+        self._refilled_at = time.monotonic()
+        self.state = self._load()
+
+    def _load(self):
+        now = time.time()
+        state = {url: {"interval": DEFAULT_INTERVAL, "next_due_at": now, "last_new_at": None, "gap_ewma": None}
+                 for url in self.feed_urls}
+        cursor = get_connection().execute(
+            f"SELECT url, poll_interval, next_due_at, last_new_at, gap_ewma FROM feeds "
+            f"WHERE url IN ({','.join('?' * len(self.feed_urls))})", self.feed_urls)
+        for url, interval, next_due_at, last_new_at, gap_ewma in cursor.fetchall():
+            state[url] = {
+                "interval": interval or DEFAULT_INTERVAL,
+                "next_due_at": next_due_at or now,
+                "last_new_at": last_new_at,
+                "gap_ewma": gap_ewma,
+            }
+        return state
+
+    def _save(self, url):
+        s = self.state[url]
+        with transaction() as conn:
+            conn.execute("""
+                INSERT INTO feeds (url, poll_interval, next_due_at, last_new_at, gap_ewma)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    poll_interval = excluded.poll_interval,
+                    next_due_at = excluded.next_due_at,
+                    last_new_at = excluded.last_new_at,
+                    gap_ewma = excluded.gap_ewma
+            """, (url, s["interval"], s["next_due_at"], s["last_new_at"], s["gap_ewma"]))
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_per_minute, self._tokens + (now - self._refilled_at) * self.max_per_minute / 60)
+        self._refilled_at = now
+
+    def due(self, now=None):
+        """Return the feeds due for a poll, most overdue first, within the rate cap."""
+        now = time.time() if now is None else now
+        self._refill()
+        due = sorted((u for u in self.feed_urls if self.state[u]["next_due_at"] <= now),
+                     key=lambda u: self.state[u]["next_due_at"])
+        due = due[:int(self._tokens)]
+        self._tokens -= len(due)
+        return due
+
+    def record(self, url, new_count, now=None):
+        """Update a feed's cadence after a poll that found new_count new entries."""
+        now = time.time() if now is None else now
+        s = self.state[url]
+        if new_count > 0:
+            if s["last_new_at"] is not None:
+                gap = (now - s["last_new_at"]) / new_count
+                s["gap_ewma"] = gap if s["gap_ewma"] is None else SMOOTHING * gap + (1 - SMOOTHING) * s["gap_ewma"]
+                s["interval"] = _clamp(s["gap_ewma"] / POLLS_PER_GAP)
+            else:
+                s["interval"] = _clamp(s["interval"] / 2)
+            s["last_new_at"] = now
+        else:
+            s["interval"] = _clamp(s["interval"] * BACKOFF)
+            if s["gap_ewma"] is not None:
+                # Don't back off far beyond the feed's usual cadence
+                s["interval"] = min(s["interval"], _clamp(s["gap_ewma"]))
+        s["next_due_at"] = now + s["interval"]
+        self._save(url)
+
+    def seconds_until_next(self, now=None):
+        now = time.time() if now is None else now
+        # A worker left without feeds (more workers than feeds) just idles
+        next_due = min((self.state[u]["next_due_at"] for u in self.feed_urls), default=now + MAX_INTERVAL)
+        rate_wait = 0 if self._tokens >= 1 else (1 - self._tokens) * 60 / self.max_per_minute
+        return max(1.0, next_due - now, rate_wait)
+
+    def summary(self):
+        return ", ".join(f"{u.split('/')[2]}={self.state[u]['interval'] / 60:.1f}m" for u in self.feed_urls)
@@ -0,0 +1,263 @@
+import codecs
+import re
+import threading
+import time
+import requests
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+import metrics
+
+try:
+    # Optional: a faster incremental parser; html.parser is used without it
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# ------------------------
+#   Scraper Parameters
+# ------------------------
+
+## Maximum number of article pages downloaded at the same time
+MAX_SCRAPE_WORKERS = 16
+
+## Maximum number of simultaneous requests to one publisher
+MAX_PER_HOST = 4
+
+## Seconds before a single article request is abandoned
+SCRAPE_TIMEOUT = 10
+
+## Characters of article text kept; scoring reads the first 500, tweets the rest
+MAX_TEXT_CHARS = 4000
+
+## Bytes read from one page before extraction gives up on the rest
+MAX_PAGE_BYTES = 1_500_000
+
+## Size of each chunk read from the response and fed to the parser
+CHUNK_BYTES = 16384
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# One pooled session keeps TCP/TLS connections alive between articles
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_adapter = requests.adapters.HTTPAdapter(pool_connections=32, pool_maxsize=MAX_SCRAPE_WORKERS)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+_host_limits = defaultdict(lambda: threading.BoundedSemaphore(MAX_PER_HOST))
+_host_limits_lock = threading.Lock()
+
+
+@contextmanager
+def _host_slot(url):
+    host = urlsplit(url).netloc.lower()
+    with _host_limits_lock:
+        sem = _host_limits[host]
+    with sem:
+        yield
+
+
+def _interleave_by_host(urls):
+    """Order URLs round-robin by host so one slow publisher doesn't take every worker."""
+    by_host = defaultdict(deque)
+    for url in urls:
+        by_host[urlsplit(url).netloc.lower()].append(url)
+    queues = list(by_host.values())
+    while queues:
+        for q in list(queues):
+            yield q.popleft()
+            if not q:
+                queues.remove(q)
+
+
+# ------------------------
+#   Extraction
+# ------------------------
+# Paragraph text is collected while the page streams in. Paragraphs inside an
+# <article> or <main> element win over the rest of the page (navigation,
+# cookie banners, related links) whenever the page has such a container.
+_CONTAINERS = {"article", "main"}
+_SKIPPED = {"script", "style", "noscript", "template", "svg"}
+
+
+class _Paragraphs:
+    def __init__(self):
+        self.page = []
+        self.article = []
+        self.page_chars = 0
+        self.article_chars = 0
+
+    def add(self, text, in_article):
+        text = text.strip()
+        if not text:
+            return
+        if in_article:
+            self.article.append(text)
+            self.article_chars += len(text)
+        else:
+            self.page.append(text)
+            self.page_chars += len(text)
+
+    def enough(self, max_chars):
+        return (self.article_chars if self.article else self.page_chars) >= max_chars
+
+    def text(self, max_chars):
+        return "\n".join(self.article or self.page)[:max_chars]
+
+
+class _StdlibExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = _Paragraphs()
+        self._containers = 0
+        self._skipped = 0
+        self._current = None
+
+    def _flush(self):
+        if self._current is not None:
+            self.paragraphs.add("".join(self._current), self._containers > 0)
+            self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _CONTAINERS:
+            self._containers += 1
+        elif tag in _SKIPPED:
+            self._skipped += 1
+        elif tag == "p":
+            self._flush()
+            self._current = []
+
+    def handle_endtag(self, tag):
+        if tag == "p" or tag in _CONTAINERS:
+            self._flush()
+        if tag in _CONTAINERS:
+            self._containers = max(0, self._containers - 1)
+        elif tag in _SKIPPED:
+            self._skipped = max(0, self._skipped - 1)
+
+    def handle_data(self, data):
+        if self._current is not None and not self._skipped:
+            self._current.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+class _LxmlExtractor:
+    def __init__(self):
+        self.paragraphs = _Paragraphs()
+        self._parser = etree.HTMLPullParser(events=("start", "end"))
+        self._containers = 0
+
+    def feed(self, data):
+        self._parser.feed(data)
+        self._drain()
+
+    def close(self):
+        self._parser.close()
+        self._drain()
+
+    def _drain(self):
+        for event, el in self._parser.read_events():
+            if el.tag in _CONTAINERS:
+                self._containers += 1 if event == "start" else -1
+            elif event == "end" and el.tag == "p":
+                self.paragraphs.add("".join(el.itertext()), self._containers > 0)
+                el.clear()
+
+
+def _extractor():
+    return _LxmlExtractor() if etree is not None else _StdlibExtractor()
+
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+
+
+def _lookup(name):
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def _charset(response, head=b""):
+    """The charset the server declared, else the page's <meta charset> in head, else UTF-8."""
+    content_type = response.headers.get("Content-Type", "") if response is not None else ""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            charset = _lookup(value.strip().strip('"'))
+            if charset:
+                return charset
+            break
+    # Both <meta charset="..."> and <meta http-equiv="Content-Type" content="...; charset=..."> sit in the first chunk
+    match = _META_CHARSET.search(head[:4096])
+    if match:
+        return _lookup(match.group(1).decode("ascii")) or "utf-8"
+    return "utf-8"
+
+
+def extract_text(html, max_chars=MAX_TEXT_CHARS):
+    """Paragraph text of a whole HTML document (str or bytes)."""
+    if isinstance(html, bytes):
+        html = html.decode(_charset(None, html), errors="replace")
+    extractor = _extractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.paragraphs.text(max_chars)
+
+
+def stream_text(response, max_chars=MAX_TEXT_CHARS, max_bytes=MAX_PAGE_BYTES, chunk_bytes=CHUNK_BYTES):
+    """Parse a streamed response chunk by chunk, stopping once enough text or max_bytes is read.
+
+    Returns (text, bytes read, CPU seconds spent decoding and parsing).
+    """
+    extractor = _extractor()
+    decoder = None
+    read = 0
+    cpu = 0.0
+    for chunk in response.iter_content(chunk_bytes):
+        read += len(chunk)
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(_charset(response, chunk))(errors="replace")
+        start = time.thread_time()
+        extractor.feed(decoder.decode(chunk))
+        cpu += time.thread_time() - start
+        if read >= max_bytes or extractor.paragraphs.enough(max_chars):
+            break
+    start = time.thread_time()
+    extractor.close()
+    text = extractor.paragraphs.text(max_chars)
+    cpu += time.thread_time() - start
+    return text, read, cpu
+
+
+@metrics.timed("scrape")
+def fetch_article_text(url):
+    with _host_slot(url):
+        with _session.get(url, timeout=SCRAPE_TIMEOUT, stream=True) as r:
+            text, read, cpu = stream_text(r)
+    metrics.observe("scrape_bytes", read, buckets=metrics.BYTES_BUCKETS)
+    metrics.observe("scrape_cpu_seconds", cpu)
+    print(f"[SCRAPE] {read / 1024:.0f} KB read, {cpu * 1000:.1f} ms CPU, {len(text)} chars: {url}")
+    return text
+
+
+def scrape_articles(urls, max_workers=MAX_SCRAPE_WORKERS):
+    """Scrape a batch of URLs concurrently, yielding (url, text) as each one finishes."""
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as pool:
+        futures = {pool.submit(fetch_article_text, url): url for url in _interleave_by_host(urls)}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                yield url, future.result()
+            except Exception as e:
+                print(f"[SCRAPE ERROR] {url} → {e}")
+                yield url, ""
@@ -0,0 +1,104 @@
+import hashlib
+import math
+import threading
+from db import get_connection
+
+# ------------------------
+#   Seen-URL Parameters
+# ------------------------
+
+## URLs the filter is sized for before it is rebuilt at twice the size
+SEEN_CAPACITY = 200_000
+
+## Target false-positive rate; positives are always confirmed against the DB
+SEEN_ERROR_RATE = 0.01
+
+## Maximum number of URLs per confirmation query (SQLite variable limit)
+CONFIRM_CHUNK = 500
+
+
+class SeenIndex:
+    """Bloom filter over articles.url, backed by the DB for confirmation.
+
+    A negative answer is definitive and never touches the DB; positives from a
+    whole fetched batch are confirmed together with one IN query instead of
+    one point query per entry.
+    """
+
+    def __init__(self, capacity=SEEN_CAPACITY, error_rate=SEEN_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, url):
+        digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _add(self, url):
+        for pos in self._positions(url):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def might_contain(self, url):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+
+    def add(self, url):
+        with self._lock:
+            if self.count >= self.capacity:
+                self._grow()
+            self._add(url)
+
+    def _grow(self):
+        grown = SeenIndex(self.capacity * 2, self.error_rate)
+        grown._load()
+        self.capacity, self.num_bits, self.num_hashes = grown.capacity, grown.num_bits, grown.num_hashes
+        self.bits, self.count = grown.bits, grown.count
+        print(f"[SEEN] Filter grown to {self.capacity} URLs ({len(self.bits) / 1024:.0f} KB)")
+
+    def _load(self):
+        cursor = get_connection().execute("SELECT url FROM articles")
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            for (url,) in rows:
+                if url:
+                    self._add(url)
+
+    @classmethod
+    def load(cls, capacity=SEEN_CAPACITY, error_rate=SEEN_ERROR_RATE):
+        """Build the index from every URL already stored in articles."""
+        cursor = get_connection().execute("SELECT COUNT(*) FROM articles")
+        stored = cursor.fetchone()[0]
+        while capacity < stored * 2:
+            capacity *= 2
+        index = cls(capacity, error_rate)
+        index._load()
+        print(f"[SEEN] Loaded {index.count} URLs ({len(index.bits) / 1024:.0f} KB)")
+        return index
+
+    def contains(self, url):
+        if not self.might_contain(url):
+            return False
+        cursor = get_connection().execute("SELECT 1 FROM articles WHERE url = ?", (url,))
+        return cursor.fetchone() is not None
+
+    def filter_new(self, urls):
+        """Return the subset of urls that are not stored yet, preserving order."""
+        urls = list(dict.fromkeys(urls))
+        maybe_seen = [u for u in urls if self.might_contain(u)]
+        confirmed = set()
+        conn = get_connection()
+        for i in range(0, len(maybe_seen), CONFIRM_CHUNK):
+            chunk = maybe_seen[i:i + CONFIRM_CHUNK]
+            cursor = conn.execute(
+                f"SELECT url FROM articles WHERE url IN ({','.join('?' * len(chunk))})", chunk
+            )
+            confirmed.update(row[0] for row in cursor.fetchall())
+        return [u for u in urls if u not in confirmed]
@@ -0,0 +1,46 @@
+"""Schema migrations and transactions with several processes on one database."""
+import json
+import time
+from worker_processes import result, run, start
+
+
+def test_workers_starting_together_migrate_once(tmp_path):
+    at = time.time() + 1
+    code = """
+        import sys, time
+        while time.time() < float(sys.argv[1]):
+            time.sleep(0.001)
+        import db
+        print('{}')
+    """
+    workers = [start(tmp_path, code, at, worker_id=f"w{n}") for n in range(4)]
+    for w in workers:
+        result(w)
+
+
+def test_transaction_that_reads_first_waits_for_other_writers(tmp_path):
+    out = run(tmp_path, """
+        import json, threading, time
+        from db import transaction
+        with transaction() as conn:
+            conn.execute("INSERT INTO articles (title, url) VALUES ('Story', 'http://example.com/0')")
+        errors = []
+
+        def read_then_write(title, delay):
+            time.sleep(delay)
+            try:
+                with transaction() as conn:
+                    conn.execute("SELECT COUNT(*) FROM articles").fetchone()
+                    time.sleep(0.3)
+                    conn.execute("UPDATE articles SET title = ?", (title,))
+            except Exception as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=read_then_write, args=(f"Story {n}", n * 0.1)) for n in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(json.dumps(errors))
+    """)
+    assert json.loads(out.strip().splitlines()[-1]) == []
@@ -0,0 +1,57 @@
+"""Several workers sharing one database, each in its own process."""
+import json
+import time
+from worker_processes import result, run, start
+
+ARTICLES = 200
+
+SETUP = """
+    from db import transaction
+    with transaction() as conn:
+        conn.executemany("INSERT INTO articles (title, url) VALUES (?, ?)",
+                         [(f"Story {i}", f"http://example.com/{i}") for i in range(%d)])
+""" % ARTICLES
+
+WORKER = """
+    import json, random, sys, time
+    import leases
+    from db import transaction
+    urls = [f"http://example.com/{i}" for i in range(%d)]
+    random.shuffle(urls)
+    while time.time() < float(sys.argv[1]):
+        time.sleep(0.001)
+    claimed = set()
+    for i in range(0, len(urls), 7):
+        claimed |= leases.claim_articles(urls[i:i + 7])
+    posted = []
+    for url in sorted(claimed):
+        with transaction() as conn:
+            if leases.mark_posted(conn, url):
+                posted.append(url)
+    print(json.dumps({"claimed": sorted(claimed), "posted": posted}))
+""" % ARTICLES
+
+
+def test_two_workers_never_share_an_article(tmp_path):
+    run(tmp_path, SETUP)
+    at = time.time() + 1
+    workers = [start(tmp_path, WORKER, at, worker_id=f"w{n}") for n in range(2)]
+    a, b = [result(w) for w in workers]
+
+    assert not set(a["claimed"]) & set(b["claimed"])
+    assert len(a["claimed"]) + len(b["claimed"]) == ARTICLES
+    assert a["posted"] == a["claimed"] and b["posted"] == b["claimed"]
+
+
+def test_expired_claims_go_to_other_workers_only(tmp_path):
+    run(tmp_path, SETUP)
+    out = run(tmp_path, """
+        import json, time
+        import leases
+        urls = ["http://example.com/0", "http://example.com/1"]
+        leases.STARTED_AT = time.time() - 3600
+        leases.claim_articles(urls[:1], worker_id="w0", lease=-1)
+        leases.claim_articles(urls[1:], worker_id="w1", lease=-1)
+        print(json.dumps([row[2] for row in leases.claim_abandoned(worker_id="w0")]))
+    """)
+    assert json.loads(out.strip().splitlines()[-1]) == ["http://example.com/1"]
@@ -0,0 +1,21 @@
+"""RSS entries the keyword pre-filter must keep or drop before any scraping."""
+import pytest
+import prefilter
+
+
+@pytest.mark.parametrize("title", [
+    "Spurs beat Lakers in NBA overtime",
+    "Rangers win in NHL shootout",
+    "Chiefs clinch AFC title in NFL",
+])
+def test_club_names_shared_with_other_sports_are_dropped(title):
+    assert not prefilter.check(title)[0]
+
+
+@pytest.mark.parametrize("title", [
+    "Spurs sign striker from Serie A side",
+    "Rangers beat Celtic in Scottish Premiership",
+    "Fantasy football: best picks for gameweek 5",
+])
+def test_soccer_entries_are_kept(title):
+    assert prefilter.check(title)[0]
@@ -0,0 +1,21 @@
+"""The uniqueness index against posts made by other workers."""
+import json
+from worker_processes import run
+
+
+def test_uniqueness_index_sees_other_workers_posts(tmp_path):
+    out = run(tmp_path, """
+        import json, sqlite3
+        from db import transaction
+        from uniqueness import UniquenessIndex
+        with transaction() as conn:
+            conn.execute("INSERT INTO articles (title, url) VALUES ('Story', 'http://example.com/0')")
+        index = UniquenessIndex.load()
+        other = sqlite3.connect("content_creator.db")
+        other.execute("INSERT INTO posts (article_id, caption) VALUES (1, 'Arsenal beat Chelsea in the derby')")
+        other.commit()
+        before = index.check("Arsenal beat Chelsea in the derby")[0]
+        index.refresh()
+        print(json.dumps([before, index.check("Arsenal beat Chelsea in the derby")[0]]))
+    """)
+    assert json.loads(out.strip().splitlines()[-1]) == [1, 0]
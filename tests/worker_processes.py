@@ -0,0 +1,29 @@
+"""Run snippets as separate worker processes sharing one database in a temporary directory."""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start(tmp_path, code, *args, worker_id="w0"):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, WORKER_ID=worker_id)
+    return subprocess.Popen([sys.executable, "-c", textwrap.dedent(code), *map(str, args)], cwd=tmp_path,
+                            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def result(proc):
+    """Wait for the process and parse the JSON on its last output line."""
+    out, err = proc.communicate(timeout=120)
+    assert proc.returncode == 0, err
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(tmp_path, code, worker_id="w0"):
+    """Run the code to completion and return its output."""
+    proc = start(tmp_path, code, worker_id=worker_id)
+    out, err = proc.communicate(timeout=120)
+    assert proc.returncode == 0, err
+    return out
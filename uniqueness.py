@@ -0,0 +1,142 @@
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from datetime import datetime, timezone
+from db import get_connection
+
+# ------------------------
+#   Uniqueness Parameters
+# ------------------------
+
+## Character n-gram sizes hashed into each vector
+NGRAM_SIZES = (3, 4, 5)
+
+## Width of the hashed feature space
+DIMENSIONS = 4096
+
+## Cosine similarity at or above which a title is treated as a duplicate
+DUPLICATE_THRESHOLD = 0.6
+
+## Cosine similarity at or below which a title is treated as unique
+UNIQUE_THRESHOLD = 0.35
+
+## Seconds a posted item stays in the index (the LLM prompt used today's posts)
+WINDOW = 24 * 3600
+
+## Nearest posted items handed to the LLM for borderline cases
+NEIGHBOURS = 5
+
+_URL_RE = re.compile(r"https?://\S+")
+_NON_WORD_RE = re.compile(r"[^\w#]+")
+
+
+def normalize_text(text):
+    text = _URL_RE.sub(" ", text or "").lower()
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def vectorize(text):
+    """Hashed, sublinear-TF character n-gram vector with unit L2 norm."""
+    padded = f" {normalize_text(text)} "
+    indices = [
+        zlib.crc32(padded[i:i + n].encode("utf-8")) % DIMENSIONS
+        for n in NGRAM_SIZES
+        for i in range(len(padded) - n + 1)
+    ]
+    vec = np.zeros(DIMENSIONS, dtype=np.float32)
+    if indices:
+        counts = np.bincount(indices, minlength=DIMENSIONS).astype(np.float32)
+        vec = np.log1p(counts)
+        vec /= np.linalg.norm(vec)
+    return vec
+
+
+class UniquenessIndex:
+    """Vectors of recently posted captions and titles, queried with one matrix product."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._matrix = np.zeros((64, DIMENSIONS), dtype=np.float32)
+        self._texts = []
+        self._times = []
+        self._last_post_id = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, text, timestamp=None):
+        if not normalize_text(text):
+            return
+        vec = vectorize(text)
+        with self._lock:
+            self._expire()
+            n = len(self._texts)
+            if n == len(self._matrix):
+                self._matrix = np.vstack([self._matrix, np.zeros_like(self._matrix)])
+            self._matrix[n] = vec
+            self._texts.append(text)
+            self._times.append(time.time() if timestamp is None else timestamp)
+
+    def _expire(self):
+        cutoff = time.time() - self.window
+        keep = [i for i, t in enumerate(self._times) if t >= cutoff]
+        if len(keep) == len(self._times):
+            return
+        self._matrix[:len(keep)] = self._matrix[keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._times = [self._times[i] for i in keep]
+
+    def most_similar(self, text, k=NEIGHBOURS):
+        """Return up to k (similarity, text) pairs, most similar first."""
+        vec = vectorize(text)
+        with self._lock:
+            self._expire()
+            n = len(self._texts)
+            if n == 0:
+                return []
+            sims = self._matrix[:n] @ vec
+            top = np.argsort(sims)[::-1][:k]
+            return [(float(sims[i]), self._texts[i]) for i in top]
+
+    def check(self, text, duplicate_threshold=DUPLICATE_THRESHOLD, unique_threshold=UNIQUE_THRESHOLD):
+        """Return (uniqueness, best similarity, nearest texts).
+
+        uniqueness is 1 or 0 when the similarity is decisive and None for
+        borderline cases that should go to the LLM.
+        """
+        neighbours = self.most_similar(text)
+        best = neighbours[0][0] if neighbours else 0.0
+        if best >= duplicate_threshold:
+            uniqueness = 0
+        elif best <= unique_threshold:
+            uniqueness = 1
+        else:
+            uniqueness = None
+        return uniqueness, best, [t for _, t in neighbours]
+
+    def refresh(self):
+        """Add posts stored since the last refresh, including other workers' posts."""
+        with self._refresh_lock:
+            cursor = get_connection().execute("""
+                SELECT p.id, p.caption, a.title, p.created_at
+                FROM posts p LEFT JOIN articles a ON a.id = p.article_id
+                WHERE p.id > ? AND p.created_at >= datetime('now', ?)
+                ORDER BY p.id
+            """, (self._last_post_id, f"-{int(self.window)} seconds"))
+            for post_id, caption, title, created_at in cursor.fetchall():
+                ts = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+                self.add(caption, ts)
+                self.add(title, ts)
+                self._last_post_id = post_id
+
+    @classmethod
+    def load(cls, window=WINDOW):
+        """Build the index from posts created within the window."""
+        index = cls(window)
+        index.refresh()
+        print(f"[UNIQUENESS] Loaded {len(index)} posted captions/titles")
+        return index
@@ -1,19 +1,22 @@
 import os
-import sqlite3
-import requests
-import feedparser
-import time
-import random
-from bs4 import BeautifulSoup
+import json
 from datetime import datetime, timezone
-from telethon import TelegramClient
-from langchain_community.chat_models import ChatOllama
-from langchain_core.output_parsers.json import JsonOutputParser
-from my_prompts import *
-from db import DB_PATH
-import configparser
-import tweepy 
+import my_prompts
+from db import get_connection, transaction, NON_URGENT_CANDIDATES_SQL, TODAY_POST_HISTORY_SQL, TODAY_POST_COUNT_SQL
+from feeds import FEEDS, fetch_feeds, load_feed_marks, save_feed_marks, new_entries
+from scraper import fetch_article_text, scrape_articles
+from seen import SeenIndex
+from llm_cache import LLMCache
+from uniqueness import UniquenessIndex
+from clusters import StoryClusters
+import prefilter
+from delivery import enqueue_post, platforms_for_mode
+import leases
+import content_store
+import metrics
+import clients
 import asyncio
+import threading
 
 # ------------------------
 #   General Parameters
@@ -25,159 +28,301 @@ DAILY_QUOTA = 25
 ## Thresolds for deciding about urgent posts
 INSTANT_THRESHOLD = {"freshness": 8, "impact": 7, "uniqueness":1,"proximity": 0.8}
 
+## Minimum scores for non-urgent posts
+NON_URGENT_THRESHOLD = {"proximity": 0.8, "freshness": 6, "uniqueness": 1}
+
+## Non-urgent candidates are ranked by this weighted sum of their scores,
+## halved after NON_URGENT_HALF_LIFE hours since the article was received
+NON_URGENT_WEIGHTS = {"impact": 1.0, "freshness": 0.5, "proximity": 2.0}
+NON_URGENT_HALF_LIFE = 6
+
 ### Set to telegram, if you wanna send posts to your 
 ### telegram saved message or any id you have set for TELEGRAM_ADMIN in config.ini
 ### Set to twitter if you want to post directly to twitter.
-### Set to Both if you want only save in DB
+### Set to both if you want to do both.
 ### Set to None if you want only save in DB
+### Posts are queued in the outbox table and sent by the delivery worker.
 POST_MODE = 'telegram'
 
 # ------------------------
-#   Config
+#   Seen-URL Index
 # ------------------------
-config = configparser.ConfigParser()
-config.read_file(open(r'config.ini'))
+# The in-memory indexes are built on first use, like the clients in clients.py:
+# loading them reads every stored URL plus recent posts and stories, which
+# importing utils (e.g. from backfill.py) should not pay for.
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _index(name, factory):
+    with _indexes_lock:
+        if name not in _indexes:
+            _indexes[name] = factory()
+        return _indexes[name]
+
+
+def seen_index():
+    return _index("seen", SeenIndex.load)
+
 
 # ------------------------
-#   Twitter API Credentials
+#   Uniqueness Index
 # ------------------------
-try:
-    twitter_api=None
-    TW_CONSUMER_KEY = config.get('TWITTER_API', 'TW_CONSUMER_KEY')
-    TW_CONSUMER_SECRET = config.get('TWITTER_API', 'TW_CONSUMER_SECRET')
-    TW_ACCESS_TOKEN = config.get('TWITTER_API', 'TW_ACCESS_TOKEN')
-    TW_ACCESS_SECRET = config.get('TWITTER_API', 'TW_ACCESS_SECRET')
-
-    #if all of the keys are not None
-    if TW_CONSUMER_KEY and TW_CONSUMER_SECRET and TW_ACCESS_TOKEN and TW_ACCESS_SECRET:
-        auth = tweepy.OAuth1UserHandler(
-            TW_CONSUMER_KEY, TW_CONSUMER_SECRET, TW_ACCESS_TOKEN, TW_ACCESS_SECRET
-        )
-        try:
-            twitter_api = tweepy.API(auth)
-        except Exception as ex:
-            print('Error Connecting to Twitter')
-except Exception as ex:
-    print(f'Error setting credentials for Twitter(X): {ex}')
+
+### Set to vector to decide uniqueness by similarity to recent posts and ask
+### the LLM (with only the nearest posts) for borderline cases.
+### Set to llm to send the whole day's post history to the LLM every time.
+UNIQUENESS_MODE = "vector"
+
+
+
+def uniqueness_index():
+    return _index("uniqueness", UniquenessIndex.load)
 
 
 # ------------------------
-#   Telegram API Credentials
+#   Story Clusters
 # ------------------------
-try:
-    telegram_client = None
-    API_ID = int(config.get('TELEGRAM_API', 'API_ID'))
-    API_HASH = config.get('TELEGRAM_API', 'API_HASH')
-    SESSION_NAME = config.get('TELEGRAM_API', 'SESSION_NAME')
-    TELEGRAM_ADMIN = config.get('TELEGRAM_API', 'TELEGRAM_ADMIN')   # "me" means your own account
 
-    async def get_telegram_client():
-        global telegram_client
-        if telegram_client is None:
-            telegram_client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
-            await telegram_client.start()
-        return telegram_client
-except Exception as ex:
-    print(f'Error setting credentials for Telegram: {ex}')
+### The same story from several feeds is scraped and scored once (see clusters.py).
+### Set to False to process every entry on its own.
+CLUSTER_STORIES = True
+
+
 
+def story_clusters():
+    return _index("clusters", StoryClusters.load)
 
 
 # ------------------------
 #   LLM Model
 # ------------------------
-llm_model = ChatOllama(model="gemma3:4b-it-q8_0", temperature=0, num_ctx=65535)
-parser = JsonOutputParser()
+# The ChatOllama client (and langchain_community) is only loaded on the first
+# cache miss; clients.py picks the model, num_ctx and keep_alive per task.
+
+## Scores depend on the current time (freshness), so they expire sooner than tweets
+SCORING_CACHE_TTL = 3 * 3600
+llm_cache = LLMCache()
+
+### Set to combined to get all five scores from one inference per article.
+### Set to split to use the separate scoring and uniqueness prompts.
+SCORING_MODE = "combined"
+
+
+class UnusableAnswer(ValueError):
+    """The LLM answered, but not with JSON that parses and passes validation."""
+
+
+async def _arun_cached(template_name, template, inputs, key_inputs=None, json_output=False, ttl=None, validate=None):
+    """Run template through the task's Ollama model with ainvoke, reusing a cached answer for the same normalized inputs.
+
+    key_inputs replaces inputs in the cache key when some inputs (e.g. the
+    current time) should not split the cache. validate is called on parsed
+    JSON before it is cached and may raise ValueError to reject the answer;
+    either failure is raised as UnusableAnswer, transport errors as they are.
+    """
+    model = clients.model_for(template_name)
+    key = llm_cache.make_key(template_name, template, model, inputs if key_inputs is None else key_inputs)
+    cached = llm_cache.get(key, ttl=ttl)
+    if cached is not None:
+        metrics.inc("llm_requests_total", template=template_name, cache="hit")
+        return json.loads(cached) if json_output else cached
+
+    messages = template.format_messages(**inputs)
+    prompt_chars = sum(len(m.content) for m in messages)
+    options = clients.llm_options(template_name, prompt_chars)
+    message = await clients.llm().ainvoke(messages, **options)
+    metrics.record_llm(template_name, message)
+    metrics.set_gauge("llm_num_ctx", options["num_ctx"], template=template_name)
+    clients.record_prompt(template_name, prompt_chars, message.response_metadata.get("prompt_eval_count"))
+    text = message.content
+    if json_output:
+        from langchain_core.utils.json import parse_json_markdown
+        try:
+            result = parse_json_markdown(text)
+            if validate:
+                validate(result)
+        except ValueError as e:
+            raise UnusableAnswer(f"{template_name}: {e}") from e
+        llm_cache.put(key, template_name, model, json.dumps(result))
+    else:
+        result = text.strip()
+        llm_cache.put(key, template_name, model, result)
+    return result
 
 
-# ------------------------
-#   Twitter API Sender
-# ------------------------
-def post_to_twitter(tweet_text):
-    try:
-        twitter_api.update_status(status=tweet_text)
-        print(f"[TWITTER] ✅ Tweet posted")
-    except Exception as e:
-        print(f"[TWITTER ERROR] {e}")
+def _run_sync(coro):
+    """Run an LLM coroutine to completion from synchronous code."""
+    return asyncio.run(coro)
 
 
 # ------------------------
-#   Telegram API Sender
+#   Platform Senders
 # ------------------------
-def send_to_telegram_via_telethon(message):
+# Used by the delivery worker; each raises on failure so the outbox retries it.
+async def get_telegram_client():
+    client = clients.get("telegram")
+    if client is None:
+        raise RuntimeError("Telegram credentials are not configured")
+    if not client.is_connected():
+        await client.start()
+    return client
+
+
+async def send_to_twitter(tweet_text):
+    twitter_api = clients.get("twitter")
+    if twitter_api is None:
+        raise RuntimeError("Twitter credentials are not configured")
+    await asyncio.to_thread(twitter_api.update_status, status=tweet_text)
+
+
+async def send_to_telegram(message):
     """Send draft tweet to admin via Telethon."""
-    async def _send():
-        try:
-            client = await get_telegram_client()
-            await client.send_message(TELEGRAM_ADMIN, message)
-            print("[TELETHON] ✅ Sent to admin")
-        except Exception as e:
-            print(f"[TELETHON ERROR] {e}")
+    client = await get_telegram_client()
+    await client.send_message(clients.telegram_admin(), message)
 
-    # Run in event loop
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            asyncio.ensure_future(_send())
-        else:
-            loop.run_until_complete(_send())
-    except RuntimeError:
-        asyncio.run(_send())
+
+SENDERS = {"twitter": send_to_twitter, "telegram": send_to_telegram}
 
 
 # ------------------------
 #   LLM Scoring & Tweets
 # ------------------------
-def score_article_with_llm(url, title, content, history, article_received_datetime):
+## Accepted range of every score the LLM returns
+SCORE_RANGES = {
+    "proximity": (0, 1),
+    "freshness": (0, 10),
+    "impact": (0, 10),
+    "uniqueness": (0, 1),
+}
+
+
+def _validate_scores(keys):
+    def validate(scores):
+        if not isinstance(scores, dict):
+            raise ValueError(f"expected a JSON object, got {type(scores).__name__}")
+        if "soccer_relevance" in keys and not isinstance(scores.get("soccer_relevance"), bool):
+            raise ValueError("soccer_relevance must be true or false")
+        for k in keys:
+            if k == "soccer_relevance":
+                continue
+            v = scores.get(k)
+            low, high = SCORE_RANGES[k]
+            if isinstance(v, bool) or not isinstance(v, (int, float)) or not low <= v <= high:
+                raise ValueError(f"{k}={v!r} is outside {low}–{high}")
+    return validate
+
+
+def _scoring_inputs(title, content, article_received_datetime, as_of=None):
+    return {
+        "title": title,
+        "content": content[:500],
+        "current_datetime": (as_of or datetime.now(timezone.utc)).strftime("%Y-%m-%d %H:%M:%S"),
+        "article_received_datetime": article_received_datetime.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+async def _ascore_combined(title, content, history, article_received_datetime):
+    return await _arun_cached("combined_scoring", my_prompts.COMBINED_SCORING_PROMPT_TEMPLATE, {
+        **_scoring_inputs(title, content, article_received_datetime),
+        "history": "\n".join(history),
+    }, key_inputs={"title": title, "content": content[:500], "history": history},
+        json_output=True, ttl=SCORING_CACHE_TTL,
+        validate=_validate_scores(["soccer_relevance", "proximity", "freshness", "impact", "uniqueness"]))
+
+
+async def _ascore_relevance(title, content, article_received_datetime, as_of=None):
+    key_inputs = {"title": title, "content": content[:500]}
+    if as_of:
+        # Freshness judged at another time than now must not share the live entry
+        key_inputs["as_of"] = as_of.strftime("%Y-%m-%d %H:%M:%S")
+    return await _arun_cached("scoring", my_prompts.SCORING_PROMPT_TEMPLATE,
+                              _scoring_inputs(title, content, article_received_datetime, as_of),
+                              key_inputs=key_inputs, json_output=True,
+                              ttl=SCORING_CACHE_TTL,
+                              validate=_validate_scores(["soccer_relevance", "proximity", "freshness", "impact"]))
+
+
+async def _ascore_split(title, content, history, article_received_datetime):
+    scores = await _ascore_relevance(title, content, article_received_datetime)
+    unq_answer = await _arun_cached("uniqueness", my_prompts.UNIQUENESS_PROMPT_TEMPLATE, {
+        "current_title": title,
+        "history": "\n".join(history)
+    }, json_output=True, validate=_validate_scores(["uniqueness"]))
+    scores['uniqueness'] = unq_answer['uniqueness']
+    return scores
+
+
+def save_article_scores(url, scores):
+    with transaction() as conn:
+        conn.execute(
+            """UPDATE articles 
+               SET proximity=?, freshness=?, impact=?, uniqueness=? WHERE url = ?""",
+            (
+                scores["proximity"],
+                scores["freshness"],
+                scores["impact"],
+                scores["uniqueness"],
+                url
+            ),
+        )
+    metrics.inc("articles_total", outcome="scored")
+
+
+@metrics.timed("score")
+async def ascore_article_with_llm(url, title, content, history, article_received_datetime):
     try:
-        chain = SCORING_PROMPT_TEMPLATE | llm_model | parser
-        scores = chain.invoke({
-            "title": title,
-            "content": content[:500],
-            "current_datetime": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            "article_received_datetime": article_received_datetime.strftime("%Y-%m-%d %H:%M:%S")
-        })
-        soccer_relevance=scores['soccer_relevance']
-        proximity=scores['proximity']
-        freshness=scores['freshness']
-        impact=scores['impact']
-
-        chain = UNIQUENESS_PROMPT_TEMPLATE | llm_model | parser
-        unq_answer = chain.invoke({
-            "current_title": title,
-            "history": "\n".join(history)
-        })
-        uniqueness=unq_answer['uniqueness']
-        scores['uniqueness']=uniqueness
-        
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """UPDATE articles 
-                   SET proximity=?, freshness=?, impact=?, uniqueness=? WHERE url = ?""",
-                (
-                    proximity,
-                    freshness,
-                    impact,
-                    uniqueness,
-                    url
-                ),
-            )
-            conn.commit()
+        scores = None
+        if UNIQUENESS_MODE == "vector":
+            uniqueness_index().refresh()
+            uniqueness, similarity, neighbours = uniqueness_index().check(title)
+            if uniqueness is not None:
+                scores = await _ascore_relevance(title, content, article_received_datetime)
+                scores["uniqueness"] = uniqueness
+                save_article_scores(url, scores)
+                return scores
+            print(f"[UNIQUENESS] Borderline similarity {similarity:.2f}, asking the LLM")
+            history = neighbours
+        elif history is None:
+            history = get_today_post_history()
+
+        if SCORING_MODE == "combined":
+            try:
+                scores = await _ascore_combined(title, content, history, article_received_datetime)
+            except UnusableAnswer as e:
+                print(f"[LLM WARN] Combined scoring unusable, falling back to split prompts: {e}")
+        if scores is None:
+            scores = await _ascore_split(title, content, history, article_received_datetime)
+
+        save_article_scores(url, scores)
         return scores
     except Exception as e:
         print(f"[LLM ERROR] Worthiness check failed: {e}")
         return {k: -1 for k in ["proximity","freshness","impact","uniqueness"]}
 
 
-def generate_tweet(title, content):
+def score_article_with_llm(url, title, content, history, article_received_datetime):
+    return _run_sync(ascore_article_with_llm(url, title, content, history, article_received_datetime))
+
+
+async def arescore_article(title, content, article_published_datetime, as_of):
+    """Proximity, freshness and impact as the current prompt/model would have scored them at as_of (arrival)."""
+    return await _ascore_relevance(title, content, article_published_datetime, as_of=as_of)
+
+
+@metrics.timed("generate_tweet")
+async def agenerate_tweet(title, content):
     try:
-        chain = TWITTER_PROMPT_TEMPLATE | llm_model
-        return chain.invoke({"title": title, "content": content}).content.strip()
+        return await _arun_cached("tweet", my_prompts.TWITTER_PROMPT_TEMPLATE, {"title": title, "content": content})
     except Exception as e:
         print(f"[LLM ERROR] Tweet generation failed: {e}")
         return ""
 
 
+def generate_tweet(title, content):
+    return _run_sync(agenerate_tweet(title, content))
+
+
 def _compose_tweet_with_url(text, url, max_chars=250):
     """Truncate tweet safely before adding URL."""
     budget = max_chars - 24  # reserve for URL
@@ -190,48 +335,41 @@ def _compose_tweet_with_url(text, url, max_chars=250):
 # ------------------------
 #   RSS + Scraping
 # ------------------------
-def fetch_top_sports_news():
-    feeds = [
-        "https://www.espn.com/espn/rss/news",
-        "https://www.skysports.com/rss/12040",
-        "https://feeds.bbci.co.uk/sport/football/rss.xml",
-        "https://www.fourfourtwo.com/feeds.xml"
-    ]
-    results = []
-    for feed_url in feeds:
-        try:
-            parsed = feedparser.parse(feed_url)
-            for entry in parsed.entries:
-                if entry.get("published_parsed"):
-                    dt_local = datetime.fromtimestamp(
-                        time.mktime(entry.published_parsed), tz=timezone.utc
-                    )
-                    hours_passed = (datetime.now(timezone.utc) - dt_local).total_seconds() / 3600
-                    if hours_passed > 12:
-                        continue
-                else:
-                    dt_local = datetime.now(timezone.utc)
-                results.append({
-                    "title": entry.get("title", ""),
-                    "url": entry.get("link", ""),
-                    "published": entry.get("published", ""),
-                    "published_dt": dt_local,
-                })
-        except Exception as e:
-            print(f"[RSS ERROR] {feed_url} → {e}")
-    return results
+@metrics.timed("fetch")
+def fetch_top_sports_news(feed_urls=None, marks=None):
+    """Yield the entries that appeared in the polled feeds since their last high-water mark.
+
+    The advanced marks of the feeds that changed are collected in marks (a
+    dict); pass it to admit_news_items() so they are saved in the same
+    transaction as the entries, and a cycle that fails is fetched again.
+    """
+    feed_urls = list(feed_urls or FEEDS)
+    stored = load_feed_marks(feed_urls)
+    marks = {} if marks is None else marks
+    for feed in fetch_feeds(feed_urls):
+        if not feed["entries"]:
+            continue
+        mark = marks[feed["url"]] = stored[feed["url"]]
+        for entry, published in new_entries(feed["url"], feed["entries"], mark):
+            metrics.inc("articles_total", outcome="seen")
+            yield {
+                "title": entry.get("title", ""),
+                "url": entry.get("link", ""),
+                "published": entry.get("published", ""),
+                "published_dt": datetime.fromtimestamp(published, tz=timezone.utc),
+                "summary": entry.get("summary", ""),
+                "feed": feed["url"],
+            }
+
+
+def store_article_content(url, text):
+    content_store.store(url, text)
 
 
 def save_article_content(url):
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(r.content, "html.parser")
-        text = "\n".join(p.get_text() for p in soup.find_all("p") if p.get_text())
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE articles SET content = ? WHERE url = ?", (text, url))
-            conn.commit()
+        text = fetch_article_text(url)
+        store_article_content(url, text)
         return text
     except Exception as e:
         print(f"[SCRAPE ERROR] {url} → {e}")
@@ -242,98 +380,186 @@ def save_article_content(url):
 #   DB Utilities
 # ------------------------
 def article_already_processed(url):
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM articles WHERE url = ?", (url,))
-        return cursor.fetchone() is not None
-
-
-def get_today_articles_not_posted():
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""select
-        id,title,content,proximity,freshness,impact,engagement,uniqueness,virality
-            FROM articles WHERE date(received_at) = date('now') and posted=0
-        """)
-
-        ret=[
-            {"id":row[0],"title":row[1],"content":row[2],"proximity":row[3],"freshness":row[4],"impact":row[5],
-        "engagement":row[6],"uniqueness":row[7],"virality":row[8]
-        } 
-            for row in cursor.fetchall()]
-        return ret if len(ret)!=0 else []
+    return seen_index().contains(url)
 
 
 def get_today_post_history():
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT caption FROM posts WHERE date(created_at) = date('now')
-        """)
-        ret=[row[0] for row in cursor.fetchall()]
-        return ret if len(ret)!=0 else []
+    cursor = get_connection().execute(TODAY_POST_HISTORY_SQL)
+    ret=[row[0] for row in cursor.fetchall()]
+    return ret if len(ret)!=0 else []
 
 # === Post Quota and History ===
 def get_today_post_count():
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM posts WHERE date(created_at) = date('now')")
-        return cursor.fetchone()[0]
+    cursor = get_connection().execute(TODAY_POST_COUNT_SQL)
+    return cursor.fetchone()[0]
 
-def save_rss_item(title, url, published):
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR IGNORE INTO articles (title, url, published_at)
-            VALUES (?, ?, ?)
-        """, (title, url, published))
-        conn.commit()
+def save_rss_item(title, url, published, summary=""):
+    with transaction() as conn:
+        conn.execute("""
+            INSERT OR IGNORE INTO articles (title, url, published_at, summary)
+            VALUES (?, ?, ?, ?)
+        """, (title, url, published, summary))
+    seen_index().add(url)
+
+
+def promote_orphaned_stories():
+    """Claim the next entry of each story whose representative was given up unscored.
+
+    Returns rows of (id, title, url, published_at, received_at), like leases.claim_abandoned().
+    """
+    if not CLUSTER_STORIES:
+        return []
+    with transaction() as conn:
+        claimed = [i for i in story_clusters().promote_orphans(conn) if leases.claim_article_id(i)]
+        return conn.execute(f"""
+            SELECT id, title, url, published_at, received_at FROM articles
+            WHERE id IN ({','.join('?' * len(claimed))})
+        """, claimed).fetchall()
+
+
+def cluster_item(conn, item):
+    """Put a stored entry into its story cluster; True if it duplicates a story already being processed."""
+    if not CLUSTER_STORIES:
+        return False
+    story = story_clusters().assign(conn, item["url"], item["title"], item.get("summary", ""))
+    if story is None:
+        return False
+    print(f"[{datetime.now()}][CLUSTER] Same story as \"{story}\": {item['title']}")
+    metrics.inc("articles_total", outcome="skipped", reason="clustered")
+    return True
+
+
+def save_rejected_item(title, url, published, reason):
+    """Store an entry dropped before scraping so it is never re-checked and can be audited."""
+    with transaction() as conn:
+        conn.execute("""
+            INSERT OR IGNORE INTO articles (title, url, published_at, reason, proximity, impact)
+            VALUES (?, ?, ?, ?, 0, 0)
+        """, (title, url, published, reason))
+    seen_index().add(url)
 
 
 def save_post(article_url, caption, tweet, reason):
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM articles WHERE url = ?", (article_url,))
+    with transaction() as conn:
+        cursor = conn.execute("SELECT id FROM articles WHERE url = ?", (article_url,))
         row = cursor.fetchone()
         if not row:
             print(f"[ERROR] Article not found for post.")
             return None
         article_id = row[0]
-        cursor.execute("""
+        cursor = conn.execute("""
             INSERT INTO posts (article_id, caption, tweet, reason)
             VALUES (?, ?, ?, ?)
         """, (article_id, caption, tweet, reason))
-        conn.commit()
-        return cursor.lastrowid
+        enqueue_post(cursor.lastrowid, tweet, platforms_for_mode(POST_MODE))
+    uniqueness_index().refresh()
+    story_clusters().discard(article_id)
+    metrics.inc("articles_total", outcome="posted")
+    return cursor.lastrowid
 
 
 # ------------------------
 #   Main Handlers
 # ------------------------
-def process_news_item(title, url, published, published_dt):
+def process_news_item(title, url, published, published_dt, summary=""):
     if article_already_processed(url):
         print(f"[{datetime.now()}][SKIP] Already processed: {title}")
+        metrics.inc("articles_total", outcome="skipped", reason="seen")
         return
 
+    keep, reason = prefilter.check(title, summary)
+    if not keep:
+        print(f"[{datetime.now()}][PREFILTER] Dropped ({reason}): {title}")
+        metrics.inc("articles_total", outcome="skipped", reason="prefilter")
+        save_rejected_item(title, url, published, reason)
+        return
+
+    with transaction() as conn:
+        save_rss_item(title, url, published, summary)
+        if CLUSTER_STORIES:
+            story_clusters().refresh()
+        if cluster_item(conn, {"title": title, "url": url, "summary": summary}):
+            return
+    if not leases.claim_articles([url]):
+        print(f"[{datetime.now()}][SKIP] Claimed by another worker: {title}")
+        return
     print(f"[{datetime.now()}][NEW] Processing: {title}")
-    save_rss_item(title, url, published)
+    metrics.inc("articles_total", outcome="new")
     content = save_article_content(url)
+    score_and_post(title, url, content, published_dt)
+
+
+def admit_news_items(items, marks=None):
+    """Store the cycle's new, on-topic feed entries and return the ones this worker claimed, keyed by URL.
+
+    marks, as filled by fetch_top_sports_news(), are saved in the same transaction.
+    """
+    items = list(items)
+    new_items = {}
+    unseen = set(seen_index().filter_new(item["url"] for item in items))
+    with transaction() as conn:
+        for item in items:
+            if item["url"] in new_items or item["url"] not in unseen:
+                print(f"[{datetime.now()}][SKIP] Already processed: {item['title']}")
+                metrics.inc("articles_total", outcome="skipped", reason="seen")
+                continue
+            keep, reason = prefilter.check(item["title"], item.get("summary", ""))
+            if not keep:
+                print(f"[{datetime.now()}][PREFILTER] Dropped ({reason}): {item['title']}")
+                metrics.inc("articles_total", outcome="skipped", reason="prefilter")
+                save_rejected_item(item["title"], item["url"], item["published"], reason)
+                continue
+            save_rss_item(item["title"], item["url"], item["published"], item.get("summary", ""))
+            new_items[item["url"]] = item
+        if CLUSTER_STORIES:
+            story_clusters().refresh()
+        for url in [url for url, item in new_items.items() if cluster_item(conn, item)]:
+            del new_items[url]
+        claimed = leases.claim_articles(new_items)
+        if marks:
+            save_feed_marks(marks)
+    for url, item in list(new_items.items()):
+        if url not in claimed:
+            print(f"[{datetime.now()}][SKIP] Claimed by another worker: {item['title']}")
+            del new_items[url]
+            continue
+        print(f"[{datetime.now()}][NEW] Processing: {item['title']}")
+        metrics.inc("articles_total", outcome="new")
+    return new_items
+
+
+def process_news_items(items, marks=None):
+    """Process a cycle's feed entries, scraping all new articles in one parallel batch."""
+    new_items = admit_news_items(items, marks)
+    for url, content in scrape_articles(new_items):
+        if content:
+            store_article_content(url, content)
+        item = new_items[url]
+        try:
+            score_and_post(item["title"], url, content, item["published_dt"])
+        except Exception as e:
+            print(f"[PROCESS ERROR] {url} → {e}")
+
 
+def score_and_post(title, url, content, published_dt):
     if not content or len(content.strip()) < 400:
         print(f"[SKIP] Content too short.")
+        metrics.inc("articles_total", outcome="skipped", reason="short")
+        leases.release(url)
         return
 
     scores = score_article_with_llm(
         url=url,
         title=title,
         content=content,
-        history=get_today_post_history(),
+        history=get_today_post_history() if UNIQUENESS_MODE == "llm" else None,
         article_received_datetime=published_dt
     )
 
     if get_today_post_count() < DAILY_QUOTA and should_post_instant(scores):
         post_article(url, title, content)
-
+    else:
+        leases.release(url)
 
 
 def should_post_instant(scores):
@@ -349,79 +575,39 @@ def post_article(url, title, content, reason="instant"):
     print(f"POSTING: {title}")
     raw = generate_tweet(title, content)
     tweet = _compose_tweet_with_url(raw, url)
-    save_post(url, tweet, tweet, reason)
-
-    if POST_MODE == "twitter":
-        post_to_twitter(tweet)
-    elif POST_MODE == "telegram":
-        send_to_telegram_via_telethon(tweet)
-    elif POST_MODE.lower() == "both":
-        post_to_twitter(tweet)
-        send_to_telegram_via_telethon(tweet)
-    else:
-        pass
+    with transaction() as conn:
+        if not leases.mark_posted(conn, url):
+            print(f"[SKIP] Already posted by another worker: {title}")
+            return
+        save_post(url, tweet, tweet, reason)
 
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("UPDATE articles SET posted = 1 WHERE url = ?", (url,))
-        conn.commit()
-
-
-def decide_non_urgent_posts():
-    candidate_posts = get_today_articles_not_posted()
-    already_posted_today = len(get_today_post_history())
-    remaining_capacity = max(0, DAILY_QUOTA - already_posted_today)
-    if remaining_capacity <= 0:
-        return []
 
-    # Step 1: Keep only true soccer posts (proximity == 10, fresh, unique)
-    filtered = [
-        p for p in candidate_posts
-        if p.get("proximity", 0) >= 0.8
-        and p.get("freshness", 0) >= 6
-        and p.get("uniqueness", 0) == 1
-    ]
-    if not filtered:
+def get_non_urgent_candidates(limit):
+    """Return up to limit (id, rank) pairs for today's unposted articles that pass the thresholds, best first."""
+    if limit <= 0:
         return []
+    params = {f"w_{k}": w for k, w in NON_URGENT_WEIGHTS.items()}
+    params.update(NON_URGENT_THRESHOLD, half_life=NON_URGENT_HALF_LIFE, limit=limit)
+    return get_connection().execute(NON_URGENT_CANDIDATES_SQL, params).fetchall()
 
-    # Step 2: Split into high-impact (≥7) vs. low-impact (<7, e.g., MLS)
-    high_impact = [p for p in filtered if p.get("impact", 0) >= 7]
-    low_impact = [p for p in filtered if p.get("impact", 0) < 7]
 
-    # Step 3: Select posts, prioritizing high-impact first
-    selected = []
-    if high_impact:
-        k = min(len(high_impact), remaining_capacity)
-        selected.extend(random.sample(high_impact, k=k))
-        remaining_capacity -= k
-
-    # Step 4: If quota still available, allow low-impact posts (MLS, etc.)
-    if remaining_capacity > 0 and low_impact:
-        k = min(len(low_impact), remaining_capacity)
-        selected.extend(random.sample(low_impact, k=k))
-
-    return [p["id"] for p in selected]
+def decide_non_urgent_posts():
+    remaining_capacity = max(0, DAILY_QUOTA - get_today_post_count())
+    candidates = get_non_urgent_candidates(remaining_capacity)
+    if candidates:
+        print(f"[NON-URGENT] {len(candidates)} selected, ranks {candidates[0][1]:.1f}…{candidates[-1][1]:.1f}")
+    return [article_id for article_id, _ in candidates]
 
 
 def post_non_urgent(article_id):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT url, title, content FROM articles WHERE id = ?", (article_id,))
-    row = cur.fetchone()
+    cursor = get_connection().execute("SELECT url, title FROM articles WHERE id = ?", (article_id,))
+    row = cursor.fetchone()
     if not row:
         return
-    url, title, content = row
-    print(f"POSTING: {title}")
-    raw = generate_tweet(title, content)
-    tweet = _compose_tweet_with_url(raw, url)
-    save_post(url, tweet, tweet, 'non-urgent')
-
-    if POST_MODE == "twitter":
-        post_to_twitter(tweet)
-    elif POST_MODE == "telegram":
-        send_to_telegram_via_telethon(tweet)
-
-    cur.execute("UPDATE articles SET posted = 1 WHERE id = ?", (article_id,))
-    conn.commit()
+    url, title = row
+    if not leases.claim_article_id(article_id):
+        print(f"[SKIP] Claimed by another worker: {title}")
+        return
+    post_article(url, title, content_store.load(article_id), reason="non-urgent")
 
 